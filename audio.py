@@ -0,0 +1,91 @@
+import os
+import threading
+
+import pygame
+
+SOUNDS = {
+    'win': 'assets/win.mp3',
+    'explode': 'assets/explode.mp3',
+    'flag': 'assets/flag.mp3',
+}
+MUSIC = 'assets/bg_music.mp3'
+
+
+class Audio:
+    #mixer start-up and mp3 decoding happen on a background thread so the
+    #first frame never waits for them; until then play() is a no-op
+    def __init__(self, enabled=True):
+        self.sounds = {}
+        self.available = False
+        self.music_loaded = False
+        self.music_wanted = False
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        if enabled:
+            threading.Thread(target=self.load, name="audio-loader", daemon=True).start()
+        else:
+            self.ready.set()
+
+    def load(self):
+        try:
+            pygame.mixer.init()
+        except pygame.error as err:
+            #no audio device, run silently
+            print(f"Audio unavailable: {err}")
+            self.ready.set()
+            return
+
+        sounds = {}
+        for name, path in SOUNDS.items():
+            if os.path.exists(path):
+                try:
+                    sounds[name] = pygame.mixer.Sound(path)
+                except pygame.error as err:
+                    print(f"Asset loading warning: {err}")
+
+        music_loaded = False
+        if os.path.exists(MUSIC):
+            try:
+                pygame.mixer.music.load(MUSIC)
+                pygame.mixer.music.set_volume(0.8)
+                music_loaded = True
+            except pygame.error as err:
+                print(f"Asset loading warning: {err}")
+
+        with self.lock:
+            self.sounds = sounds
+            self.available = True
+            self.music_loaded = music_loaded
+            start_music = music_loaded and self.music_wanted
+        if start_music:
+            self._start_music()
+        self.ready.set()
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound:
+            sound.play()
+
+    def play_music(self):
+        #starts now if loaded, otherwise as soon as the loader finishes
+        with self.lock:
+            self.music_wanted = True
+            loaded = self.music_loaded
+        if loaded:
+            self._start_music()
+
+    def stop_music(self):
+        with self.lock:
+            self.music_wanted = False
+            loaded = self.music_loaded
+        if loaded:
+            try:
+                pygame.mixer.music.stop()
+            except pygame.error:
+                pass
+
+    def _start_music(self):
+        try:
+            pygame.mixer.music.play(-1)
+        except pygame.error:
+            pass
@@ -0,0 +1,2 @@
+#Benchmarks for the board engine and renderer.
+#Run from the repository root, e.g. `python -m benchmarks.board_memory`
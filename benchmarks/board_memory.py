@@ -0,0 +1,56 @@
+import gc
+import time
+import tracemalloc
+
+from game_logic import Tile
+from grid import Grid
+
+SIZES = [(9, 9), (100, 100), (1000, 1000)]
+
+
+def build_tiles(w, h):
+    #the original list-of-lists representation
+    return [[Tile(x, y) for y in range(h)] for x in range(w)]
+
+
+def measure_memory(factory, w, h):
+    gc.collect()
+    tracemalloc.start()
+    board = factory(w, h)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return board, size
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def tile_scans(tiles):
+    flags = sum(t.state == 'flagged' for row in tiles for t in row)
+    revealed = sum(1 for row in tiles for t in row if t.value != -1 and not t.clickable)
+    return flags, revealed
+
+
+def grid_scans(grid):
+    return grid.count_flags(), grid.count_revealed_safe()
+
+
+def run():
+    print(f"{'size':>11} {'repr':>6} {'memory':>12} {'build (s)':>11} {'scan (s)':>11}")
+    for w, h in SIZES:
+        for name, factory, scan in (('tiles', build_tiles, tile_scans), ('grid', Grid, grid_scans)):
+            board, size = measure_memory(factory, w, h)
+            build = best_of(lambda: factory(w, h), repeat=1 if w * h > 10**5 else 3)
+            scan_time = best_of(lambda: scan(board))
+            print(f"{w:>5}x{h:<5} {name:>6} {size / 1024:>10.1f}KB {build:>11.5f} {scan_time:>11.5f}")
+            del board
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+
+from game_logic import count_adjacent, reveal, reveal_many
+from engine import Game, PLAYING
+from grid import FLAGGED
+
+SIZES = [(30, 16, 99), (100, 100, 1500), (300, 300, 13000)]
+
+
+def per_tile(grid, cells):
+    #the previous chord: one reveal (and fill) per neighbour
+    for x, y in cells:
+        reveal(grid, grid.tile(x, y))
+
+
+def batched(grid, cells):
+    reveal_many(grid, cells)
+
+
+def play(w, h, n, chord, seed=0):
+    #flags every mine, then chords each number next to a hidden tile, like a player would
+    game = Game(w, h, n, seed=seed)
+    game.click(w // 2, h // 2)
+    grid = game.grid
+    grid.state[grid.mines] = FLAGGED
+    grid.recount()
+    elapsed = 0.0
+    chords = 0
+    while game.status == PLAYING:
+        hidden = ~grid.revealed & ~grid.mines
+        numbers = np.argwhere(grid.revealed & (grid.value > 0) & (count_adjacent(hidden) > 0))
+        before = grid.revealed_safe
+        for x, y in numbers.tolist():
+            cells = [(nx, ny) for nx in range(max(x - 1, 0), min(x + 2, w))
+                     for ny in range(max(y - 1, 0), min(y + 2, h))]
+            start = time.perf_counter()
+            chord(grid, cells)
+            elapsed += time.perf_counter() - start
+            chords += 1
+        game.check_win()
+        if grid.revealed_safe == before:
+            #parts of the board not reachable by chording, open one by hand
+            x, y = np.argwhere(~grid.revealed & ~grid.mines)[0].tolist()
+            game.click(x, y)
+    return elapsed, chords
+
+
+def run():
+    print(f"{'size':>13} {'chords':>8} {'per tile (s)':>13} {'batched (s)':>12} {'speedup':>8}")
+    for w, h, n in SIZES:
+        old, chords = play(w, h, n, per_tile)
+        new, _ = play(w, h, n, batched)
+        print(f"{w:>4}x{h:<4}x{n:<5} {chords:>7} {old:>13.4f} {new:>12.4f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,52 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 5
+
+#runs in a fresh interpreter: import, build the window, draw the first frame
+CHILD = """
+import time
+t0 = time.perf_counter()
+import pygame
+import main
+t_import = time.perf_counter()
+game = main.MineSweeperGame()
+t_init = time.perf_counter()
+game.draw_frame()
+pygame.display.flip()
+t_frame = time.perf_counter()
+game.audio.ready.wait()
+t_audio = time.perf_counter()
+print(json.dumps({'import': t_import - t0, 'init': t_init - t_import,
+                  'frame': t_frame - t_init, 'first_frame': t_frame - t0,
+                  'audio_ready': t_audio - t0}))
+"""
+
+
+def launch():
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', 'import json\n' + CHILD],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - start
+    result = json.loads(out.strip().splitlines()[-1])
+    result['launch_to_frame'] = wall
+    return result
+
+
+def run():
+    runs = [launch() for _ in range(RUNS)]
+    print(f"{'phase':>16} {'median (ms)':>12} {'min (ms)':>10}")
+    for key in ('import', 'init', 'frame', 'first_frame', 'launch_to_frame', 'audio_ready'):
+        values = [r[key] * 1000 for r in runs]
+        print(f"{key:>16} {statistics.median(values):>12.1f} {min(values):>10.1f}")
+
+
+if __name__ == '__main__':
+    run()
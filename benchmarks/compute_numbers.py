@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+from game_logic import Tile, compute_numbers
+from grid import Grid
+
+SIZES = [(9, 9), (20, 20), (100, 100), (300, 300), (1000, 1000), (4000, 4000)]
+DENSITY = 0.2
+#the per-tile path takes seconds per call past this many tiles
+TILE_LIMIT = 1000 * 1000
+
+
+def random_mask(w, h, seed=0):
+    return np.random.default_rng(seed).random((w, h)) < DENSITY
+
+
+def tiles_from_mask(mask):
+    w, h = mask.shape
+    tiles = [[Tile(x, y) for y in range(h)] for x in range(w)]
+    for x, y in zip(*np.nonzero(mask)):
+        tiles[x][y].value = -1
+    return tiles
+
+
+def grid_from_mask(mask):
+    grid = Grid(*mask.shape)
+    grid.value[mask] = -1
+    return grid
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run():
+    print(f"{'size':>11} {'tiles (s)':>11} {'grid (s)':>11} {'speedup':>9}")
+    for w, h in SIZES:
+        mask = random_mask(w, h)
+        grid = grid_from_mask(mask)
+        fast = timed(lambda: compute_numbers(grid))
+        if w * h <= TILE_LIMIT:
+            tiles = tiles_from_mask(mask)
+            slow = timed(lambda: compute_numbers(tiles))
+            assert all(tiles[x][y].value == grid.value[x, y] for x in range(w) for y in range(h))
+            print(f"{w:>5}x{h:<5} {slow:>11.5f} {fast:>11.5f} {slow / fast:>8.0f}x")
+        else:
+            print(f"{w:>5}x{h:<5} {'-':>11} {fast:>11.5f} {'-':>9}")
+
+
+if __name__ == '__main__':
+    run()
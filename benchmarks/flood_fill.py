@@ -0,0 +1,38 @@
+import sys
+import time
+
+import numpy as np
+
+from game_logic import compute_numbers, reveal_area
+from grid import Grid
+
+SIZES = [(200, 200), (1000, 1000), (2000, 2000)]
+DENSITIES = [0.01, 0.05, 0.12]
+
+
+def make_board(w, h, density, seed=0):
+    rng = np.random.default_rng(seed)
+    grid = Grid(w, h)
+    mask = rng.random((w, h)) < density
+    #keep the opening click safe
+    cx, cy = w // 2, h // 2
+    mask[cx - 1:cx + 2, cy - 1:cy + 2] = False
+    grid.value[mask] = -1
+    return compute_numbers(grid)
+
+
+def run():
+    limit = sys.getrecursionlimit()
+    print(f"{'size':>11} {'density':>8} {'revealed':>10} {'time (s)':>10} {'cells/s':>12}")
+    for w, h in SIZES:
+        for density in DENSITIES:
+            grid = make_board(w, h, density)
+            start = time.perf_counter()
+            found = reveal_area(grid, grid.tile(w // 2, h // 2))
+            elapsed = time.perf_counter() - start
+            print(f"{w:>5}x{h:<5} {density:>8.2f} {len(found):>10} {elapsed:>10.4f} {len(found) / elapsed:>12.0f}")
+    assert sys.getrecursionlimit() == limit
+
+
+if __name__ == '__main__':
+    run()
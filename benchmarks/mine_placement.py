@@ -0,0 +1,50 @@
+import random
+import time
+
+from game_logic import mines
+from grid import Grid
+
+SIZES = [(30, 16), (100, 100), (500, 500)]
+DENSITIES = [0.1, 0.3, 0.5, 0.7, 0.9]
+
+
+def rejection_mines(start_tile, tiles, n, rng):
+    #the previous implementation, kept here as the reference point
+    w = len(tiles)
+    h = len(tiles[0])
+    mines_set = set()
+    sx, sy = start_tile.x, start_tile.y
+    blocked = set([(sx + dx, sy + dy) for dx in [-1, 0, 1] for dy in [-1, 0, 1]
+                   if 0 <= sx + dx < w and 0 <= sy + dy < h])
+    while len(mines_set) < n:
+        x = rng.randint(0, w - 1)
+        y = rng.randint(0, h - 1)
+        if (x, y) in blocked:
+            continue
+        mines_set.add((x, y))
+    for (x, y) in mines_set:
+        tiles.value[x, y] = -1
+    return tiles
+
+
+def timed(place, w, h, n, seed=0):
+    grid = Grid(w, h)
+    start = time.perf_counter()
+    place(grid.tile(w // 2, h // 2), grid, n, random.Random(seed))
+    return time.perf_counter() - start, grid
+
+
+def run():
+    print(f"{'size':>9} {'density':>8} {'mines':>7} {'rejection (s)':>14} {'shuffle (s)':>12}")
+    for w, h in SIZES:
+        for density in DENSITIES:
+            n = min(int(w * h * density), w * h - 9)
+            old, _ = timed(rejection_mines, w, h, n)
+            new, grid = timed(mines, w, h, n)
+            #same seed, same board
+            assert (timed(mines, w, h, n)[1].value == grid.value).all()
+            print(f"{w:>4}x{h:<4} {density:>8.0%} {n:>7} {old:>14.5f} {new:>12.5f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+from no_guess import NoGuessGenerator
+import settings
+
+BOARDS = 20
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def measure(generator, w, h, n, count):
+    #first-click latency: time from the click to a seed whose board needs no guessing
+    latencies = []
+    tried = 0
+    for _ in range(count):
+        start = time.perf_counter()
+        generator.generate(w, h, n, w // 2, h // 2)
+        latencies.append(time.perf_counter() - start)
+        tried += generator.tried
+    return latencies, tried / count
+
+
+def run(boards=BOARDS):
+    workers = sorted({1, os.cpu_count() or 1})
+    print(f"{'difficulty':>10} {'workers':>8} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'max (ms)':>9} {'candidates':>11}")
+    for name, (w, h, n) in settings.difficulty_settings.items():
+        for count in workers:
+            generator = NoGuessGenerator(workers=count, timeout=60)
+            generator.start()
+            #let the pool finish spawning so its start-up is not billed to the first board
+            generator.generate(9, 9, 10, 4, 4)
+            try:
+                latencies, candidates = measure(generator, w, h, n, boards)
+            finally:
+                generator.close()
+            ms = [t * 1000 for t in latencies]
+            print(f"{name:>10} {count:>8} {percentile(ms, 50):>9.1f} {percentile(ms, 90):>9.1f} "
+                  f"{percentile(ms, 99):>9.1f} {max(ms):>9.1f} {candidates:>11.1f}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else BOARDS)
@@ -0,0 +1,59 @@
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from board import MineSweeperBoard
+from engine import LOST, WON
+from game_logic import initialise
+from grid import FLAGGED, FLOWER
+import settings
+
+FRAMES = 50
+
+
+def draw_direct(board):
+    #the old path: every tile painted from scratch, text rendered each time
+    codes = board.tile_codes()
+    for x in range(board.GRID_W):
+        for y in range(board.GRID_H):
+            board.paint_tile(board.screen, board.tile_rect(x, y), codes[x, y], (x + y) % 2 == 0)
+
+
+def frame_time(draw, board):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        draw(board)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def scenarios(board, name):
+    w, h, m = settings.difficulty_settings[name]
+    board.apply_difficulty(name)
+    initialise(board.tiles, board.tiles.tile(w // 2, h // 2), m, seed=1)
+    yield 'opened'
+    #every other mine flagged, then the board is lost so all mines show
+    board.tiles.state.reshape(-1)[(board.tiles.value.reshape(-1) == -1).nonzero()[0][::2]] = FLAGGED
+    board.game.finish(LOST)
+    yield 'game over'
+    #won: every mine turns into a pulsing flower
+    board.tiles.state[board.tiles.mines] = FLOWER
+    board.game.status = WON
+    board.flower_animation_time = time.time()
+    yield 'won'
+
+
+def run():
+    board = MineSweeperBoard()
+    print(f"{'difficulty':>10} {'scene':>10} {'direct (ms)':>12} {'atlas (ms)':>11} {'speedup':>8}")
+    for name in settings.difficulty_settings:
+        for scene in scenarios(board, name):
+            board.draw_board()
+            direct = frame_time(draw_direct, board)
+            cached = frame_time(MineSweeperBoard.draw_board, board)
+            print(f"{name:>10} {scene:>10} {direct * 1000:>12.3f} {cached * 1000:>11.3f} {direct / cached:>7.1f}x")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,50 @@
+import os
+import random
+import tempfile
+import time
+
+from engine import Game, READY
+import replay
+
+GAMES = 20000
+
+
+def write_games(path, count, seed=0):
+    rng = random.Random(seed)
+    recorder = replay.Recorder(path)
+    for _ in range(count):
+        game = Game(9, 9, 10, seed=rng.getrandbits(63))
+        while not game.over and game.clicks < 40:
+            x, y = rng.randrange(9), rng.randrange(9)
+            if game.status != READY and rng.random() < 0.2:
+                game.flag(x, y)
+                recorder.record(game, replay.FLAG, x, y)
+            else:
+                game.click(x, y)
+                recorder.record(game, replay.CLICK, x, y)
+        recorder.finish()
+    recorder.close()
+
+
+def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'replays.bin')
+        start = time.perf_counter()
+        write_games(path, GAMES)
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        games = moves = 0
+        for record in replay.read_games(path):
+            games += 1
+            moves += len(record.moves)
+        read = time.perf_counter() - start
+
+        size = os.path.getsize(path)
+        print(f"games {games}, moves {moves}, file {size / 1024:.0f}KB ({size / moves:.1f} bytes/move)")
+        print(f"play + record {GAMES / written:,.0f} games/s, read {games / read:,.0f} games/s "
+              f"({moves / read:,.0f} moves/s)")
+
+
+if __name__ == '__main__':
+    run()
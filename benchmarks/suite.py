@@ -0,0 +1,222 @@
+#The engine and renderer hot paths in one seeded run, checked against a stored baseline.
+#  python -m benchmarks.suite                   run, compare with benchmarks/baseline.json
+#  python -m benchmarks.suite --save-baseline   run and make this run the baseline
+#  python -m benchmarks.suite -k click -o out.json
+#exits with 1 when a case is slower than its baseline by more than the tolerance
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+import settings
+from engine import Game
+from game_logic import mines, compute_numbers, initialise
+from grid import Grid
+from metrics import board_metrics
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SEED = 1234
+REPEAT = 5
+
+#the presets plus custom boards well past them
+BOARDS = [(name, w, h, m) for name, (w, h, m) in settings.difficulty_settings.items()] + [
+    ('200x200', 200, 200, 6400),
+    ('1000x1000', 1000, 1000, 160000),
+]
+DENSITIES = (0.1, 0.2, 0.5)
+
+#clicks timed per board, on safe tiles in a seeded order
+CLICKS = 200
+
+#each sample repeats a case until this much of it has been timed, so cases of a
+#few microseconds are averaged over many runs instead of being timer noise
+SAMPLE_MS = 1.0
+
+#slower than the baseline by more than this fraction and MIN_DELTA ms is a regression,
+#the floor keeps timer and scheduler noise on the microsecond cases from failing a run
+TOLERANCE = 0.25
+MIN_DELTA = 0.05
+
+
+def board_mines(w, h, n, seed):
+    grid = Grid(w, h)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    mines(grid.tile(w // 2, h // 2), grid, n, rng)
+    return time.perf_counter() - start
+
+
+def board_numbers(w, h, n, seed):
+    grid = Grid(w, h)
+    mines(grid.tile(w // 2, h // 2), grid, n, random.Random(seed))
+    start = time.perf_counter()
+    compute_numbers(grid)
+    return time.perf_counter() - start
+
+
+def metrics(w, h, n, seed):
+    #3BV, openings and islands of a finished layout
+    grid = Grid(w, h)
+    initialise(grid, grid.tile(w // 2, h // 2), n, seed=seed, cache=None)
+    start = time.perf_counter()
+    board_metrics(grid.value)
+    return time.perf_counter() - start
+
+
+def first_click(w, h, n, seed):
+    #placement, numbers and the opening fill, without the layout cache
+    grid = Grid(w, h)
+    start = time.perf_counter()
+    initialise(grid, grid.tile(w // 2, h // 2), n, seed=seed, cache=None)
+    return time.perf_counter() - start
+
+
+def clicks(w, h, n, seed):
+    #mean time of one Game.click (reveal and the win check) on a safe tile
+    game = Game(w, h, n, seed=seed, clock=lambda: 0.0)
+    game.click(w // 2, h // 2)
+    grid = game.grid
+    cells = np.argwhere(~grid.revealed & ~grid.mines).tolist()
+    random.Random(seed).shuffle(cells)
+    cells = cells[:CLICKS]
+    if not cells:
+        return 0.0
+    start = time.perf_counter()
+    for x, y in cells:
+        game.click(x, y)
+    return (time.perf_counter() - start) / len(cells)
+
+
+class Renderer:
+    #one offscreen board shared by the draw cases, nothing is written to rec/
+    board = None
+
+    @classmethod
+    def get(cls):
+        if cls.board is None:
+            settings.replay_path = None
+            settings.records_path = None
+            from board import MineSweeperBoard
+            cls.board = MineSweeperBoard()
+        return cls.board
+
+
+def draw_board(w, h, n, seed):
+    #a full repaint of the opened board's visible tiles
+    board = Renderer.get()
+    board.difficulty_settings['Custom'] = (w, h, n)
+    board.apply_difficulty('Custom')
+    initialise(board.tiles, board.tiles.tile(w // 2, h // 2), n, seed=seed, cache=None)
+    board.draw_board()
+    start = time.perf_counter()
+    board.draw_board()
+    return time.perf_counter() - start
+
+
+def cases():
+    #(name, function, w, h, mines)
+    for name, w, h, m in BOARDS:
+        for density in DENSITIES:
+            yield f'mines/{name}/{density:.0%}', board_mines, w, h, min(int(w * h * density), w * h - 9)
+    for fn in (board_numbers, first_click, metrics, clicks, draw_board):
+        for name, w, h, m in BOARDS:
+            yield f'{fn.__name__}/{name}', fn, w, h, m
+
+
+def sample(fn, w, h, n):
+    #mean seconds per run over at least SAMPLE_MS of timed work
+    total, runs = 0.0, 0
+    while total * 1000 < SAMPLE_MS:
+        total += fn(w, h, n, SEED)
+        runs += 1
+    return total / runs
+
+
+def measure(fn, w, h, n, repeat):
+    #same seed every repeat, so each run does the same work; best and median in ms
+    times = sorted(sample(fn, w, h, n) * 1000 for _ in range(repeat))
+    return {'best_ms': round(times[0], 4), 'median_ms': round(times[len(times) // 2], 4)}
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'seed': SEED,
+    }
+
+
+def compare(name, result, baseline, tolerance):
+    #'new', 'ok' or 'REGRESSED', and the ratio to the baseline's best
+    base = baseline.get(name)
+    if base is None:
+        return 'new', None
+    ratio = result['best_ms'] / base['best_ms'] if base['best_ms'] else 1.0
+    if result['best_ms'] > base['best_ms'] * (1 + tolerance) and result['best_ms'] - base['best_ms'] > MIN_DELTA:
+        return 'REGRESSED', ratio
+    return 'ok', ratio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare it with the stored baseline.")
+    parser.add_argument('-k', '--filter', default='', help="only run cases whose name contains this")
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT, help="runs per case, the best one counts")
+    parser.add_argument('-o', '--output', help="also write the results as JSON here")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="allowed slowdown as a fraction of the baseline (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    regressed = []
+    print(f"{'case':<28} {'best (ms)':>10} {'median (ms)':>12} {'vs base':>8}")
+    for name, fn, w, h, n in cases():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(fn, w, h, n, args.repeat)
+        verdict, ratio = compare(name, result, baseline, args.tolerance)
+        if verdict == 'REGRESSED':
+            regressed.append(name)
+        shown = f"{ratio:.2f}x" if ratio is not None else verdict
+        flag = '  REGRESSED' if verdict == 'REGRESSED' else ''
+        print(f"{name:<28} {result['best_ms']:>10.3f} {result['median_ms']:>12.3f} {shown:>8}{flag}")
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.save_baseline:
+        if args.filter and os.path.exists(args.baseline):
+            #a filtered run only replaces its own cases
+            with open(args.baseline) as f:
+                report['results'] = dict(json.load(f)['results'], **results)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"baseline saved to {args.baseline}")
+
+    if regressed:
+        print(f"{len(regressed)} case(s) slower than the baseline by more than {args.tolerance:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
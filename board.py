@@ -1,19 +1,50 @@
 import pygame
-import sys
 import time
 import os
 import math
-from game_logic import Tile, initialise, reveal_tile, flag_tile
+import numpy as np
+from audio import Audio
+from replay import Recorder
+from records import Records, board_key
+from profiler import profiler
+from no_guess import NoGuessGenerator
+from engine import Game, READY, PLAYING, WON
+from endless import EndlessWorld
+from grid import SAFE, FLAGGED, MINE_HIT, FLOWER
+from solver import MINE
 import settings
-import file_manager
+
+#tile appearance codes used by the renderer, 0-8 are revealed numbers
+CODE_HIDDEN = 9
+CODE_FLAG = 10
+CODE_MINE = 11
+CODE_MINE_HIT = 12
+CODE_WRONG_FLAG = 13
+CODE_FLOWER = 14
+
+#pre-scaled frames in the win flower animation
+FLOWER_FRAMES = 12
+
+#seconds between refreshes of the profiler overlay numbers
+PROFILE_REFRESH = 0.25
+
+#the three-digit timer stops here
+TIMER_MAX = 999
+
+#smallest window, so the status bar and the game over popup always fit
+MIN_WINDOW_W = 360
+MIN_BOARD_H = 250
 
 class MineSweeperBoard:
 
-    def __init__(self):
-        self.difficulty_settings = settings.difficulty_settings
+    def __init__(self, difficulty='Easy'):
+        #Endless has no fixed size, see apply_difficulty
+        self.difficulty_settings = dict(settings.difficulty_settings, Custom=settings.custom_board, Endless=None)
         self.tile_size = settings.tile_size
         
-        pygame.init()
+        #only the modules the first frame needs, audio starts in the background
+        pygame.display.init()
+        pygame.font.init()
         pygame.display.set_caption("Minesweeper")
         self.screen = None 
         self.clock = pygame.time.Clock()
@@ -25,7 +56,6 @@ class MineSweeperBoard:
         self.font_difficulty = pygame.font.Font(None, 20)
 
 
-        self.start_time = 0.0 
         self.best_time = None 
 
         self.dropdown_active = False
@@ -37,186 +67,262 @@ class MineSweeperBoard:
         
         #assets
         self.flower = None
-        self.win_bgm = None
-        self.boom = None
-        self.sound_flag = None
+        self.flower_loaded = False
         self.music_started = False
         self.flower_animation_time = 0
-        
-        self.load_assets()
-        self.apply_difficulty('Easy')
 
-    def load_assets(self):
-        try:
-            pygame.mixer.init()
-            if os.path.exists('flower.png'):
-                self.flower = pygame.image.load('flower.png').convert_alpha()
-                self.flower = pygame.transform.smoothscale(self.flower, (int(self.tile_size * 0.8), int(self.tile_size * 0.8)))
-
-            if os.path.exists(f'assets/win.mp3'):
-                self.win_bgm = pygame.mixer.Sound(f'assets/win.mp3')
-
-            if os.path.exists(f'assets/explode.mp3'):
-                self.boom = pygame.mixer.Sound(f'assets/explode.mp3')
-            
-            if os.path.exists(f'assets/flag.mp3'):
-                self.sound_flag = pygame.mixer.Sound(f'assets/flag.mp3')
-            
-            if os.path.exists(f'assets/bg_music.mp3'):
-                pygame.mixer.music.load(f'assets/bg_music.mp3')
-                pygame.mixer.music.set_volume(0.8)
-        except Exception as e:
-            print(f"Asset loading warning: {e}")
+        self.atlas = None
+        self.atlas_size = None
+        self.flower_frames = None
+        self.flower_static = None
+        self.flower_frames_size = None
+
+        self.show_profile = False
+        self.profile_summary = None
+        self.profile_updated = 0.0
+        if settings.profile:
+            profiler.enable()
+
+        self.recorder = Recorder(settings.replay_path)
+        self.records = Records(settings.records_path)
+        self.game = None
+        self.generator = NoGuessGenerator() if settings.no_guess else None
+        if self.generator is not None:
+            self.generator.start()
+        
+        self.apply_difficulty(difficulty)
+        self.audio = Audio(settings.audio_enabled)
 
-    def get_best_time(self, difficulty_name):
-        return f'rec/best_time_{difficulty_name}.txt'
+    def record_key(self, difficulty_name):
+        if difficulty_name == 'Custom':
+            return board_key('Custom', *self.difficulty_settings['Custom'])
+        return board_key(difficulty_name)
 
     def load_best_time(self, difficulty_name):
-        filename = self.get_best_time(difficulty_name)
-        val = file_manager.load_best_time(filename)
-        if val == "N/A":
-            return None
-        try:
-            return float(val)
-        except ValueError:
-            return None
-
+        return self.records.best_time(self.record_key(difficulty_name))
 
     def save_best_time(self, new_best_time):
-        filename = self.get_best_time(self.difficulty_name)
-        try:
-            saved_val = file_manager.save_best_time(new_best_time, filename)
-            self.best_time = saved_val
-            print(f"🎉 New best time for {self.difficulty_name}: {new_best_time:.2f}s")
-        except Exception as e:
-            print(f"Error saving best time")
+        #the store writes in the background, the popup reads the cached value
+        self.best_time = self.records.submit_time(self.record_key(self.difficulty_name), new_best_time)
+        print(f"🎉 New best time for {self.difficulty_name}: {new_best_time:.2f}s")
 
     def apply_difficulty(self, name):
-        w, h, m = self.difficulty_settings[name]
+        self.endless = name == 'Endless'
+        w, h, m = (0, 0, 0) if self.endless else self.difficulty_settings[name]
+        self.tile_size = settings.tile_size
 
         self.GRID_W = w
         self.GRID_H = h
         self.mc = m
-        self.GAME_W = self.GRID_W * self.tile_size
-        self.GAME_H = self.GRID_H * self.tile_size + 50
+        #the window fits the board up to max_window, bigger boards scroll
+        max_w, max_h = settings.max_window
+        self.GAME_W = max(MIN_WINDOW_W, min(self.GRID_W * self.tile_size, max_w))
+        self.GAME_H = max(MIN_BOARD_H, min(self.GRID_H * self.tile_size, max_h - 50)) + 50
+        if self.endless:
+            self.GAME_W, self.GAME_H = max_w, max_h
+        self.view_x = 0
+        self.view_y = 0
         self.difficulty_name = name
         
-        self.best_time = self.load_best_time(name)
+        #endless games end on a mine, there is no time to beat
+        self.best_time = None if self.endless else self.load_best_time(name)
         
         self.screen = pygame.display.set_mode((self.GAME_W, self.GAME_H))
         
-        self.tiles = self.create_empty_board()
-        self.is_initial_click = True
-        self.game_over = False
-        self.game_won = False
-        self.start_time = 0.0
-        self.current_time = 0.0
-        self.timer_running = False
+        self.recorder.finish()
+        self.close_world()
+        if self.endless:
+            self.game = EndlessWorld(settings.endless_density, store_path=settings.endless_store)
+        else:
+            self.game = Game(self.GRID_W, self.GRID_H, self.mc, generator=self.generator)
+        self.tiles = self.game.grid
         self.restart_button = None
         self.dropdown_active = False
         
         self.flag_count = 0
         self.mines_left = self.mc
         self.flower_animation_time = 0
+
+        self.full_redraw = True
+        self.drawn_codes = None
+        self.drawn_flower_phase = None
+        self.drawn_status = None
+        self.drawn_popup = None
+        self.popup_rect = None
+        self.hint = None
+        self.drawn_hint = None
+        self.drawn_view = None
+        self.game_logged = False
+        self.stats_open = False
+        self.stats = None
+        self.stats_rect = None
+        self.center_on(w // 2, h // 2)
         
-    def create_empty_board(self):
-        return [[Tile(x, y) for y in range(self.GRID_H)] for x in range(self.GRID_W)]
+    def close_world(self):
+        #stops the chunk loader of an endless game and drops its stored chunks
+        if isinstance(self.game, EndlessWorld):
+            self.game.close()
+
+    def tick(self):
+        #per-frame upkeep: an endless world loads, fills and evicts chunks around the view
+        if self.endless:
+            over = self.game.over
+            self.game.update(*self.visible_tiles())
+            if self.game.over and not over:
+                #a click that waited for its chunk to load found a mine
+                self.audio.play('explode')
+
+    def next_update(self):
+        #seconds until the scene changes without input, None if only input can change it
+        waits = []
+        if self.endless and self.game.busy:
+            waits.append(0.0)
+        shown = self.drawn_status[1] if self.drawn_status else -1
+        if self.timer_running and shown < TIMER_MAX:
+            #the status bar shows whole seconds, counted from the one on screen so a
+            #wake-up just short of the boundary is followed by another one
+            waits.append(shown + 1 - self.current_time)
+        if self.flower_animation_time > 0:
+            step = math.pi / 3 / FLOWER_FRAMES
+            waits.append(step - (time.time() - self.flower_animation_time) % step)
+        if self.show_profile:
+            waits.append(PROFILE_REFRESH - (time.perf_counter() - self.profile_updated))
+        return max(0.0, min(waits)) if waits else None
+
+    #game state lives on the headless engine, the board only reads it
+    @property
+    def is_initial_click(self):
+        return self.game.status == READY
+
+    @property
+    def game_over(self):
+        return self.game.over
+
+    @property
+    def game_won(self):
+        return self.game.status == WON
+
+    @property
+    def timer_running(self):
+        return self.game.status == PLAYING
+
+    @property
+    def current_time(self):
+        return self.game.elapsed()
+
+    def counter(self):
+        #mines left, or the tiles opened so far in endless mode
+        if self.endless:
+            return self.tiles.revealed_safe
+        return max(0, self.mc - self.tiles.flag_count)
 
     def update_mine_counter(self):
-        flag_count = sum(t.state == 'flagged' for row in self.tiles for t in row)
+        flag_count = self.tiles.flag_count
         self.flag_count = flag_count
         self.mines_left = max(0, self.mc - flag_count)
 
+    def record_game(self):
+        #every finished game goes to the stats table once, endless games have no result to rank
+        if self.game_over and self.game.replayable and not self.game_logged:
+            self.game_logged = True
+            self.records.add_game(self.record_key(self.difficulty_name), self.game)
+
     def check_win(self):
-        total_tiles = self.GRID_W * self.GRID_H
-        target_reveals = total_tiles - self.mc
-        
-        revealed_safe_tiles = sum(
-            1 for row in self.tiles 
-            for tile in row 
-            if tile.value != -1 and not tile.clickable
-        )
-        
-        if revealed_safe_tiles >= target_reveals:
-            self.timer_running = False
-            if self.start_time > 0:
-                self.current_time = time.time() - self.start_time
-            else:
-                self.current_time = 0.0
-            
-            self.game_won = True
-            self.game_over = True
-            
-            if self.win_bgm:
-                self.win_bgm.play()
-            try:
-                pygame.mixer.music.stop()
-            except:
-                pass
+        #celebrates once when the engine reports a win
+        self.record_game()
+        if self.game_won and self.flower_animation_time == 0:
+            self.audio.play('win')
+            self.audio.stop_music()
             
             self.flower_animation_time = time.time()
             
-            for row in self.tiles:
-                for tile in row:
-                    if tile.value == -1:
-                        tile.state = 'flower'
+            self.tiles.state[self.tiles.mines] = FLOWER
+            self.tiles.recount()
             
             if self.best_time is None or self.current_time < self.best_time:
                 self.save_best_time(self.current_time)
 
-    def draw_flower(self, rect, animated=False):
+    def render_flower(self, pulse):
+        #one flower frame at the given scale, cropped to its pixels
         if self.flower:
-            if animated and self.flower_animation_time > 0:
-                elapsed = time.time() - self.flower_animation_time
-                pulse = 0.9 + 0.1 * abs(math.sin(elapsed * 3))
-                size = int(self.tile_size * 0.8 * pulse)
-                img = pygame.transform.smoothscale(self.flower, (size, size))
-            else:
-                img = self.flower
-            
-            center_x, center_y = rect.center
-            x = center_x-img.get_width() // 2
-            y = center_y-img.get_height() // 2
-            self.screen.blit(img, (x, y))
+            size = int(self.tile_size * 0.8 * pulse)
+            return pygame.transform.smoothscale(self.flower, (size, size))
+
+        frame = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
+        center_x, center_y = frame.get_rect().center
+        petal_color = (255, 105, 180)
+        center_color = (255, 215, 0)
+        radius = int(self.tile_size * 0.15 * pulse)
+        for angle in range(0, 360, 72):
+            rad = math.radians(angle)
+            px = center_x + int(radius * 1.5 * math.cos(rad))
+            py = center_y + int(radius * 1.5 * math.sin(rad))
+            pygame.draw.circle(frame, petal_color, (px, py), radius)
+        pygame.draw.circle(frame, center_color, (center_x, center_y), radius)
+        return frame.subsurface(frame.get_bounding_rect()).copy()
+
+    def build_flower_frames(self):
+        #ring of pre-scaled frames covering one period of the win pulse
+        #flower.png is optional and only loaded the first time a game is won
+        if not self.flower_loaded:
+            self.flower_loaded = True
+            if os.path.exists('flower.png'):
+                try:
+                    self.flower = pygame.image.load('flower.png').convert_alpha()
+                except pygame.error as e:
+                    print(f"Asset loading warning: {e}")
+        self.flower_frames = [self.render_flower(0.9 + 0.1 * abs(math.sin(math.pi * k / FLOWER_FRAMES)))
+                              for k in range(FLOWER_FRAMES)]
+        self.flower_static = self.render_flower(1.0)
+        self.flower_frames_size = self.tile_size
+
+    def flower_phase(self):
+        #pulse = 0.9 + 0.1 * |sin(3t)| repeats every pi / 3 seconds
+        elapsed = time.time() - self.flower_animation_time
+        return int((elapsed * 3 % math.pi) / math.pi * FLOWER_FRAMES) % FLOWER_FRAMES
+
+    def draw_flower(self, rect, animated=False, surface=None):
+        if surface is None:
+            surface = self.screen
+        if self.flower_frames_size != self.tile_size:
+            self.build_flower_frames()
+        if animated and self.flower_animation_time > 0:
+            img = self.flower_frames[self.flower_phase()]
         else:
-            center_x, center_y = rect.center
-            petal_color = (255, 105, 180)
-            center_color = (255, 215, 0)
-            radius = int(self.tile_size * 0.15)
-            for angle in range(0, 360, 72):
-                rad = math.radians(angle)
-                px = center_x + int(radius * 1.5 * math.cos(rad))
-                py = center_y + int(radius * 1.5 * math.sin(rad))
-                pygame.draw.circle(self.screen, petal_color, (px, py), radius)
-            pygame.draw.circle(self.screen, center_color, (center_x, center_y), radius)
-
-    def draw_flag(self, rect, icon_mode=False):
+            img = self.flower_static
+        surface.blit(img, img.get_rect(center=rect.center))
+
+    def draw_flag(self, rect, icon_mode=False, surface=None):
+        if surface is None:
+            surface = self.screen
         center_x, center_y = rect.center
         flag_size = self.tile_size * 0.8 if not icon_mode else 15
         
         if icon_mode:
             pole_start = (center_x, center_y - flag_size * 0.6)
             pole_end = (center_x, center_y + flag_size * 0.6)
-            pygame.draw.line(self.screen, (255, 255, 255), pole_start, pole_end, 1)
+            pygame.draw.line(surface, (255, 255, 255), pole_start, pole_end, 1)
             flag_points = [
                 (center_x, center_y - flag_size * 0.6),
                 (center_x, center_y + flag_size * 0.1 + 1),
                 (center_x - flag_size * 0.5 - 5, center_y - flag_size * 0.1)
             ]
-            pygame.draw.polygon(self.screen, settings.COLOR_FLAG, flag_points)
+            pygame.draw.polygon(surface, settings.COLOR_FLAG, flag_points)
         else:
             pole_start = (center_x, center_y - flag_size * 0.4)
             pole_end = (center_x, center_y + flag_size * 0.6)
-            pygame.draw.line(self.screen, settings.COLOR_FLAG_POLE, pole_start, pole_end, 3)
+            pygame.draw.line(surface, settings.COLOR_FLAG_POLE, pole_start, pole_end, 3)
             flag_points = [
                 (center_x, center_y - flag_size * 0.4),
                 (center_x, center_y + flag_size * 0.1),
                 (center_x - flag_size * 0.5, center_y - flag_size * 0.1)
             ]
-            pygame.draw.polygon(self.screen, settings.COLOR_FLAG, flag_points)
-            pygame.draw.polygon(self.screen, settings.COLOR_TEXT, flag_points, 1)
+            pygame.draw.polygon(surface, settings.COLOR_FLAG, flag_points)
+            pygame.draw.polygon(surface, settings.COLOR_TEXT, flag_points, 1)
 
-    def draw_mine(self, rect, is_hit=False):
+    def draw_mine(self, rect, is_hit=False, surface=None):
+        if surface is None:
+            surface = self.screen
         if not hasattr(self, 'bomb'):
             if os.path.exists('assets/bomb.png'):
                 self.bomb = pygame.image.load('assets/bomb.png').convert_alpha()
@@ -225,17 +331,17 @@ class MineSweeperBoard:
                 self.bomb = None
 
         if self.bomb:
-            self.screen.blit(self.bomb, rect.topleft)
+            surface.blit(self.bomb, rect.topleft)
         else:
             center_x, center_y = rect.center
             radius = self.tile_size * 0.3
-            pygame.draw.circle(self.screen, settings.COLOR_BOMB, (center_x, center_y), int(radius))
-            pygame.draw.circle(self.screen, settings.COLOR_TEXT, (center_x, center_y), int(radius), 1)
+            pygame.draw.circle(surface, settings.COLOR_BOMB, (center_x, center_y), int(radius))
+            pygame.draw.circle(surface, settings.COLOR_TEXT, (center_x, center_y), int(radius), 1)
 
         if is_hit:
             r = int(self.tile_size * 0.5)
             center_x, center_y = rect.center
-            pygame.draw.circle(self.screen, (255, 255, 0), (center_x, center_y), r, 3)
+            pygame.draw.circle(surface, (255, 255, 0), (center_x, center_y), r, 3)
 
     def draw_clock(self, rect):
         center_x, center_y = rect.center
@@ -291,8 +397,7 @@ class MineSweeperBoard:
 
         center_x = self.GAME_W // 2
 
-        flag_count = sum(t.state == 'flagged' for row in self.tiles for t in row)
-        mines_left = max(0, self.mc - flag_count)
+        mines_left = self.counter()
         
         flag_x = center_x - 70 
         mine_text_x = flag_x + 30 
@@ -303,7 +408,7 @@ class MineSweeperBoard:
         mine_text = self.font_status.render(str(mines_left).zfill(3), True, (255, 255, 255)) 
         self.screen.blit(mine_text, (mine_text_x, 15))
 
-        timer_display = str(min(int(self.current_time), 999)).zfill(3)
+        timer_display = str(min(int(self.current_time), TIMER_MAX)).zfill(3)
         clock_x = center_x + 10
         timer_text_x = clock_x + 30
         
@@ -313,71 +418,443 @@ class MineSweeperBoard:
         timer_text = self.font_status.render(timer_display, True, (255, 255, 255))
         self.screen.blit(timer_text, (timer_text_x, 15))
 
+    #camera: view_x, view_y is the board pixel shown at the top left of the board area
+    #drawing and hit-testing only touch the tiles inside it
+    def board_rect(self):
+        return pygame.Rect(0, 50, self.GAME_W, self.GAME_H - 50)
+
+    def clamp_view(self):
+        if self.endless:
+            return
+        ts = self.tile_size
+        self.view_x = max(0, min(self.view_x, self.GRID_W * ts - self.GAME_W))
+        self.view_y = max(0, min(self.view_y, self.GRID_H * ts - (self.GAME_H - 50)))
+
+    def center_on(self, x, y):
+        ts = self.tile_size
+        self.view_x = x * ts + ts // 2 - self.GAME_W // 2
+        self.view_y = y * ts + ts // 2 - (self.GAME_H - 50) // 2
+        self.clamp_view()
+
+    def pan(self, dx, dy):
+        self.view_x += dx
+        self.view_y += dy
+        self.clamp_view()
+
+    def zoom(self, steps, pos):
+        #about 25% per wheel step, the tile under the cursor stays put
+        size = self.tile_size
+        for _ in range(abs(steps)):
+            size = size * 5 // 4 + 1 if steps > 0 else size * 4 // 5
+        size = max(settings.min_tile_size, min(size, settings.max_tile_size))
+        if size == self.tile_size:
+            return
+        mx, my = pos[0], max(pos[1] - 50, 0)
+        fx = (self.view_x + mx) / self.tile_size
+        fy = (self.view_y + my) / self.tile_size
+        self.tile_size = size
+        self.view_x = round(fx * size - mx)
+        self.view_y = round(fy * size - my)
+        self.clamp_view()
+
+    def visible_tiles(self):
+        #(x0, y0, x1, y1): the tiles at least partly inside the board area
+        ts = self.tile_size
+        x0 = self.view_x // ts
+        y0 = self.view_y // ts
+        x1 = -(-(self.view_x + self.GAME_W) // ts)
+        y1 = -(-(self.view_y + self.GAME_H - 50) // ts)
+        if self.endless:
+            return x0, y0, x1, y1
+        return x0, y0, min(self.GRID_W, x1), min(self.GRID_H, y1)
+
+    def tile_at(self, pos):
+        #(col, row) under a screen position, None outside the board
+        x, y = pos
+        if y < 50:
+            return None
+        col = (x + self.view_x) // self.tile_size
+        row = (y - 50 + self.view_y) // self.tile_size
+        if not self.endless and not (0 <= col < self.GRID_W and 0 <= row < self.GRID_H):
+            return None
+        return col, row
+
+    def tile_codes(self, x0=0, y0=0, x1=None, y1=None):
+        #what every tile in the region looks like right now, one byte per tile
+        #0-8 revealed numbers, then the CODE_* constants
+        if self.endless:
+            #chunks that are still loading show as hidden
+            codes = np.full((x1 - x0, y1 - y0), CODE_HIDDEN, dtype=np.uint8)
+            for chunk, local, view in self.game.regions(x0, y0, x1, y1):
+                codes[view] = self.region_codes(chunk.revealed[local], chunk.value[local], chunk.state[local])
+            return codes
+        g = self.tiles
+        region = (slice(x0, x1), slice(y0, y1))
+        return self.region_codes(g.revealed[region], g.value[region], g.state[region])
+
+    def region_codes(self, revealed, value, state):
+        codes = np.where(revealed, np.maximum(value, 0), CODE_HIDDEN).astype(np.uint8)
+        flagged = state == FLAGGED
+        codes[flagged & ~revealed] = CODE_FLAG
+        if self.game_over:
+            mines = value == -1
+            codes[mines & (state == SAFE)] = CODE_MINE
+            codes[state == MINE_HIT] = CODE_MINE_HIT
+            codes[flagged & ~mines] = CODE_WRONG_FLAG
+            codes[state == FLOWER] = CODE_FLOWER
+        return codes
+
+    def tile_rect(self, x, y):
+        return pygame.Rect(x * self.tile_size - self.view_x, y * self.tile_size + 50 - self.view_y,
+                           self.tile_size, self.tile_size)
+
+    def tile_background(self, code, light):
+        if code <= 8:
+            return settings.COLOR_REVEALED_LIGHT if light else settings.COLOR_REVEALED_DARK
+        if code == CODE_MINE or code == CODE_MINE_HIT:
+            return settings.COLOR_MINE
+        return settings.COLOR_UNCLICKED_LIGHT if light else settings.COLOR_UNCLICKED_DARK
+
+    def paint_content(self, surface, rect, code):
+        #everything drawn on top of the tile background
+        if 0 < code <= 8:
+            color = settings.NUMBER_COLORS.get(int(code), settings.COLOR_TEXT)
+            text_surface = self.font_small.render(str(code), True, color)
+            text_rect = text_surface.get_rect(center=rect.center)
+            surface.blit(text_surface, text_rect)
+        elif code == CODE_MINE or code == CODE_MINE_HIT:
+            self.draw_mine(rect, is_hit=code == CODE_MINE_HIT, surface=surface)
+        elif code == CODE_FLAG:
+            self.draw_flag(rect, surface=surface)
+        elif code == CODE_WRONG_FLAG:
+            self.draw_flag(rect, surface=surface)
+            x_color = (255, 0, 0)
+            x_thickness = 3
+            x_margin = 5
+            pygame.draw.line(surface, x_color,
+                           (rect.left + x_margin, rect.top + x_margin),
+                           (rect.right - x_margin, rect.bottom - x_margin),
+                           x_thickness)
+            pygame.draw.line(surface, x_color,
+                           (rect.right - x_margin, rect.top + x_margin),
+                           (rect.left + x_margin, rect.bottom - x_margin),
+                           x_thickness)
+        elif code == CODE_FLOWER:
+            self.draw_flower(rect, animated=True, surface=surface)
+
+    def paint_tile(self, surface, rect, code, light):
+        #draws one tile from scratch, without the atlas
+        surface.fill(self.tile_background(code, light), rect)
+        self.paint_content(surface, rect, code)
+
+    def build_atlas(self):
+        #pre-rendered tile pieces, rebuilt whenever the tile size changes
+        #atlas[code] = (light background, dark background, glyph or None, glyph offset)
+        #glyphs are cropped to their drawn pixels so a tile costs one fill and one small blit
+        if hasattr(self, 'bomb'):
+            del self.bomb
+        self.font_small = pygame.font.Font(None, int(self.tile_size * 0.8))
+        rect = pygame.Rect(0, 0, self.tile_size, self.tile_size)
+        self.atlas = []
+        for code in range(CODE_FLOWER):
+            layer = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self.paint_content(layer, rect, code)
+            bounds = layer.get_bounding_rect()
+            glyph = layer.subsurface(bounds).copy().convert_alpha() if bounds.width else None
+            self.atlas.append((self.tile_background(code, True), self.tile_background(code, False),
+                               glyph, bounds.topleft))
+        self.atlas_size = self.tile_size
+
+    def draw_tile(self, x, y, code):
+        rect = self.tile_rect(x, y)
+        #Surface.fill does not shorten rects hanging off the left or top edge,
+        #so a tile cut by the edge of the view only fills its visible part
+        visible = rect.clip(self.board_rect())
+        light = (x + y) % 2 == 0
+        if code == CODE_FLOWER:
+            self.screen.fill(self.tile_background(code, light), visible)
+            self.paint_content(self.screen, rect, code)
+        else:
+            light_bg, dark_bg, glyph, offset = self.atlas[code]
+            self.screen.fill(light_bg if light else dark_bg, visible)
+            if glyph:
+                self.screen.blit(glyph, (rect.x + offset[0], rect.y + offset[1]))
+        return visible
+
+    def view_key(self):
+        return self.visible_tiles() + (self.view_x, self.view_y, self.tile_size)
+
     def draw_board(self):
-        for x in range(self.GRID_W):
-            for y in range(self.GRID_H):
-                tile = self.tiles[x][y]
-                left = x * self.tile_size
-                top = y * self.tile_size + 50
-                rect = pygame.Rect(left, top, self.tile_size, self.tile_size)
-                
-                if (x + y) % 2 == 0:
-                    revealed_color = settings.COLOR_REVEALED_LIGHT
-                    unclicked_color = settings.COLOR_UNCLICKED_LIGHT
-                else:
-                    revealed_color = settings.COLOR_REVEALED_DARK
-                    unclicked_color = settings.COLOR_UNCLICKED_DARK
-
-                tile_color = unclicked_color if tile.clickable else revealed_color
-                pygame.draw.rect(self.screen, tile_color, rect)
-                
-                if self.game_over:
-                    if tile.state == 'flower':
-                        self.draw_flower(rect, animated=True)
-                    elif tile.value == -1:
-                        if tile.state == 'mine_hit':
-                            pygame.draw.rect(self.screen, settings.COLOR_MINE, rect)
-                            self.draw_mine(rect, is_hit=True)
-                        elif tile.state == 'flagged':
-                            self.draw_flag(rect)
-                        else:
-                            pygame.draw.rect(self.screen, settings.COLOR_MINE, rect)
-                            self.draw_mine(rect, is_hit=False)
-                    elif tile.state == 'flagged':
-                        self.draw_flag(rect)
-                        x_color = (255, 0, 0)
-                        x_thickness = 3
-                        x_margin = 5
-                        pygame.draw.line(self.screen, x_color,
-                                       (rect.left + x_margin, rect.top + x_margin),
-                                       (rect.right - x_margin, rect.bottom - x_margin),
-                                       x_thickness)
-                        pygame.draw.line(self.screen, x_color,
-                                       (rect.right - x_margin, rect.top + x_margin),
-                                       (rect.left + x_margin, rect.bottom - x_margin),
-                                       x_thickness)
-                    elif not tile.clickable and tile.value > 0:
-                        text = str(tile.value)
-                        color = settings.NUMBER_COLORS.get(tile.value, settings.COLOR_TEXT)
-                        text_surface = self.font_small.render(text, True, color)
-                        text_rect = text_surface.get_rect(center=rect.center)
-                        self.screen.blit(text_surface, text_rect)
-                else:
-                    if tile.clickable and tile.state == 'flagged':
-                        self.draw_flag(rect)
-                    elif not tile.clickable and tile.value > 0:
-                        text = str(tile.value)
-                        color = settings.NUMBER_COLORS.get(tile.value, settings.COLOR_TEXT)
-                        text_surface = self.font_small.render(text, True, color)
-                        text_rect = text_surface.get_rect(center=rect.center)
-                        self.screen.blit(text_surface, text_rect)
-        
+        #repaints the board area, only the visible tiles are looked at
+        if self.atlas_size != self.tile_size:
+            self.build_atlas()
+        x0, y0, x1, y1 = self.visible_tiles()
+        codes = self.tile_codes(x0, y0, x1, y1)
+        ts = self.tile_size
+        board = self.board_rect()
+        self.screen.set_clip(board)
+        #zoomed out past the board edge, the rest of the area is background
+        right = self.GRID_W * ts - self.view_x
+        bottom = self.GRID_H * ts - self.view_y + 50
+        if right < self.GAME_W:
+            self.screen.fill(settings.COLOR_REVEALED_LIGHT, (right, 50, self.GAME_W - right, self.GAME_H - 50))
+        if bottom < self.GAME_H:
+            self.screen.fill(settings.COLOR_REVEALED_LIGHT, (0, bottom, self.GAME_W, self.GAME_H - bottom))
+        fill = self.screen.fill
+        glyphs = []
+        flowers = []
+        for i, column in enumerate(codes.tolist()):
+            x = x0 + i
+            left = x * ts - self.view_x
+            for j, code in enumerate(column):
+                y = y0 + j
+                if code == CODE_FLOWER:
+                    flowers.append((x, y))
+                    continue
+                light_bg, dark_bg, glyph, offset = self.atlas[code]
+                top = y * ts + 50 - self.view_y
+                fill(dark_bg if (x + y) & 1 else light_bg, (left, top, ts, ts))
+                if glyph:
+                    glyphs.append((glyph, (left + offset[0], top + offset[1])))
+        self.screen.blits(glyphs, doreturn=False)
+        for x, y in flowers:
+            self.draw_tile(x, y, CODE_FLOWER)
+        self.draw_hint()
+        self.screen.set_clip(None)
+        self.drawn_hint = self.hint
+        self.drawn_codes = codes
+        self.drawn_view = self.view_key()
+        self.drawn_flower_phase = self.flower_phase() if self.flower_animation_time > 0 else None
+
+    def draw_board_dirty(self):
+        #redraw only tiles whose appearance changed since the last frame
+        #flowers pulse after a win, so they are redrawn whenever the frame index moves
+        #a moved or zoomed camera repaints the whole board area
+        if self.drawn_codes is None or self.view_key() != self.drawn_view or self.atlas_size != self.tile_size:
+            self.draw_board()
+            return [self.board_rect()]
+        x0, y0, x1, y1 = self.visible_tiles()
+        codes = self.tile_codes(x0, y0, x1, y1)
+        dirty = codes != self.drawn_codes
+        if self.flower_animation_time > 0:
+            phase = self.flower_phase()
+            if phase != self.drawn_flower_phase:
+                dirty |= codes == CODE_FLOWER
+                self.drawn_flower_phase = phase
+        def local(hint):
+            #hint tile as an index into the visible codes, None if off screen
+            if hint is not None:
+                x, y = hint[1]
+                if x0 <= x < x1 and y0 <= y < y1:
+                    return x - x0, y - y0
+            return None
+
+        moved = self.hint != self.drawn_hint
+        if moved:
+            #repaint the tile under the old outline
+            for hint in (self.drawn_hint, self.hint):
+                cell = local(hint)
+                if cell is not None:
+                    dirty[cell] = True
+        self.drawn_codes = codes
+        board = self.board_rect()
+        self.screen.set_clip(board)
+        rects = [self.draw_tile(x0 + i, y0 + j, codes[i, j]) for i, j in zip(*np.nonzero(dirty))]
+        cell = local(self.hint)
+        if cell is not None and (moved or dirty[cell]):
+            rects.append(self.draw_hint().clip(board))
+        self.screen.set_clip(None)
+        self.drawn_hint = self.hint
+        return rects
+
+    def show_hint(self):
+        hint = self.game.hint()
+        self.hint = hint[:2] if hint else None
+        if self.hint is not None:
+            x, y = self.hint[1]
+            x0, y0, x1, y1 = self.visible_tiles()
+            if not (x0 <= x < x1 and y0 <= y < y1):
+                self.center_on(x, y)
+
+    def draw_hint(self):
+        #outline the hinted tile, red if it is a mine to flag
+        if self.hint is None:
+            return None
+        kind, (x, y) = self.hint
+        rect = self.tile_rect(x, y)
+        color = settings.COLOR_HINT_MINE if kind == MINE else settings.COLOR_HINT
+        pygame.draw.rect(self.screen, color, rect, 3)
+        return rect
+
+    def status_key(self):
+        hover = None
+        if self.dropdown_active:
+            mouse_pos = pygame.mouse.get_pos()
+            for name, rect in self.dropdown_options_rects.items():
+                if rect.collidepoint(mouse_pos):
+                    hover = name
+        return (self.counter(), min(int(self.current_time), TIMER_MAX),
+                self.difficulty_name, self.dropdown_active, hover)
+
+    def popup_key(self):
+        if not self.game_over:
+            return None
+        hovered = self.restart_button is not None and self.restart_button.collidepoint(pygame.mouse.get_pos())
+        return (self.game_won, self.best_time, hovered)
+
+    def draw_frame(self):
+        #full repaint of the scene
+        with profiler.section('board'):
+            self.screen.fill(settings.COLOR_REVEALED_LIGHT)
+            self.draw_board()
+        with profiler.section('hud'):
+            self.draw_status_bar()
+            if self.game_over:
+                self.draw_pop_up()
+            else:
+                self.restart_button = None
+            if self.stats_open:
+                self.draw_stats()
+            if self.show_profile:
+                self.update_profile()
+                self.draw_profile()
+        self.drawn_status = self.status_key()
+        self.drawn_popup = self.popup_key()
+        self.full_redraw = False
+
+    def draw_frame_dirty(self):
+        #incremental repaint, returns the rects that need to reach the display
+        status = self.status_key()
+        if self.full_redraw or (status[3:] != self.drawn_status[3:]):
+            #the dropdown menu overlaps the board, repaint everything
+            self.draw_frame()
+            return [self.screen.get_rect()]
+
+        with profiler.section('board'):
+            rects = self.draw_board_dirty()
+        with profiler.section('hud'):
+            if status != self.drawn_status:
+                self.draw_status_bar()
+                self.drawn_status = status
+                rects.append(pygame.Rect(0, 0, self.GAME_W, 50))
+
+            if self.game_over:
+                popup = self.popup_key()
+                if rects or popup != self.drawn_popup:
+                    self.draw_pop_up()
+                    self.drawn_popup = self.popup_key()
+                    rects.append(self.popup_rect)
+            else:
+                self.restart_button = None
+            if self.stats_open and rects:
+                rects.append(self.draw_stats())
+            if self.show_profile and (self.update_profile() or rects):
+                rects.append(self.draw_profile())
+        return rects
+
+    def toggle_profile(self):
+        #the frame time overlay, the profiler records while it is shown
+        self.show_profile = not self.show_profile
+        if self.show_profile:
+            profiler.enable()
+        elif not settings.profile:
+            profiler.enable(False)
+        self.profile_summary = None
+        self.full_redraw = True
+
+    def update_profile(self):
+        #refreshes the overlay numbers a few times a second, returns True if they changed
+        now = time.perf_counter()
+        if now - self.profile_updated < PROFILE_REFRESH:
+            return False
+        self.profile_updated = now
+        self.profile_summary = profiler.summary()
+        return True
+
+    def draw_profile(self):
+        summary = self.profile_summary
+        if summary is None:
+            lines = ["measuring..."]
+        else:
+            lines = [f"FPS {summary['fps']:.0f}  p50 {summary['p50']:.1f}  p99 {summary['p99']:.1f} ms"]
+            lines += [f"{name:<10} {ms:6.2f} ms" for name, ms in summary['sections'].items()]
+        rect = pygame.Rect(4, 54, 230, 8 + 18 * len(lines))
+        self.screen.fill((20, 20, 20), rect)
+        y = rect.y + 4
+        for line in lines:
+            self.screen.blit(self.font_difficulty.render(line, True, (120, 255, 120)), (rect.x + 6, y))
+            y += 18
+        return rect
+
+    def save_trace(self):
+        #Chrome trace JSON of the recorded frames, open it in chrome://tracing or Perfetto
+        path = os.path.join(settings.trace_dir, time.strftime('trace_%Y%m%d_%H%M%S.json'))
+        try:
+            saved = profiler.dump(path)
+        except OSError as err:
+            print(f"Error saving trace: {err}")
+            return None
+        if saved:
+            print(f"Trace saved to {saved}")
+        return saved
+
+    def toggle_stats(self):
+        #the stats screen for the current board, queried once when it opens
+        if self.stats_open or self.endless:
+            self.stats_open = False
+        else:
+            self.stats_open = True
+            self.stats = self.records.stats(self.record_key(self.difficulty_name))
+        self.full_redraw = True
+
+    def stats_lines(self):
+        stats = self.stats
+        if stats is None:
+            return ["Stats are off, see records_path"]
+        played, won = stats['played'], stats['won']
+        lines = [f"Played {played}   Won {won} ({won / played:.0%})" if played else "No games yet"]
+        times = stats['percentiles']
+        if times:
+            lines.append("   ".join(f"{'Median' if q == 0.5 else f'{q:.0%}'}: {t:.1f}s" for q, t in times.items()))
+        for name, (w, n) in stats['rates'].items():
+            lines.append(f"Last {name}: {w}/{n} won" + (f" ({w / n:.0%})" if n else ""))
+        if stats['fastest']:
+            speed, duration, bbbv = stats['fastest'][0]
+            lines.append(f"Best 3BV/s: {speed:.2f} (3BV {bbbv} in {duration:.2f}s)")
+        if stats['best']:
+            lines.append("Best times:")
+            for rank, (duration, bbbv, started) in enumerate(stats['best'], 1):
+                day = time.strftime('%d %b', time.localtime(started))
+                speed = f"{bbbv / duration:.2f}/s" if duration else "-"
+                lines.append(f"{rank}. {duration:.2f}s  3BV {bbbv} ({speed})  {day}")
+        return lines
+
+    def draw_stats(self):
+        texts = [self.font_status.render(line, True, (230, 230, 230)) for line in self.stats_lines()]
+        line_h = 24
+        width = min(self.GAME_W - 20, max(340, max(text.get_width() for text in texts) + 40))
+        height = 70 + line_h * len(texts)
+        rect = pygame.Rect(0, 0, width, height)
+        rect.center = (self.GAME_W // 2, 50 + (self.GAME_H - 50) // 2)
+        self.stats_rect = rect
+
+        pygame.draw.rect(self.screen, settings.COLOR_POPUP_BG, rect, border_radius=10)
+        pygame.draw.rect(self.screen, settings.COLOR_TEXT, rect, 3, border_radius=10)
+        title = self.font_popup_text.render(f"{self.difficulty_name} stats", True, (255, 255, 255))
+        self.screen.blit(title, title.get_rect(center=(rect.centerx, rect.y + 25)))
+        y = rect.y + 50
+        for text in texts:
+            self.screen.blit(text, (rect.x + 20, y))
+            y += line_h
+        return rect
+
     def draw_pop_up(self):
         popup_width = 300
         popup_height = 220
         popup_x = (self.GAME_W - popup_width) // 2
         popup_y = (self.GAME_H - popup_height) // 2
         popup_rect = pygame.Rect(popup_x, popup_y, popup_width, popup_height)
+        self.popup_rect = popup_rect
         
         pygame.draw.rect(self.screen, settings.COLOR_POPUP_BG, popup_rect, border_radius=10)
         pygame.draw.rect(self.screen, settings.COLOR_TEXT, popup_rect, 3, border_radius=10)
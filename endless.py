@@ -0,0 +1,407 @@
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from engine import READY, PLAYING, LOST
+from game_logic import NOTHING, count_adjacent
+from grid import SAFE, FLAGGED, REVEALED, MINE_HIT
+
+#tiles per chunk side, a chunk is the unit of generation, storage and eviction
+CHUNK = 32
+
+#chunks kept in memory around the view, on every side
+MARGIN = 2
+
+#tiles the flood fill may reveal per frame, bigger openings continue next frame
+FILL_BUDGET = 4000
+
+
+@lru_cache(maxsize=512)
+def chunk_mines(seed, start, density, cx, cy):
+    #mine mask of one chunk, a pure function of the world seed and chunk position
+    #the 3x3 around the first click is always clear
+    digest = hashlib.blake2b(f"{seed}:{cx}:{cy}".encode(), digest_size=16).digest()
+    rng = np.random.default_rng(int.from_bytes(digest, 'little'))
+    mask = rng.random((CHUNK, CHUNK)) < density
+    sx, sy = start[0] - cx * CHUNK, start[1] - cy * CHUNK
+    if -1 <= sx <= CHUNK and -1 <= sy <= CHUNK:
+        mask[max(sx - 1, 0):max(sx + 2, 0), max(sy - 1, 0):max(sy + 2, 0)] = False
+    mask.flags.writeable = False
+    return mask
+
+
+def chunk_values(seed, start, density, cx, cy):
+    #numbers for one chunk, border tiles count the mines of the neighbouring chunks
+    padded = np.zeros((CHUNK + 2, CHUNK + 2), dtype=np.bool_)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            mask = chunk_mines(seed, start, density, cx + dx, cy + dy)
+            #the part of the neighbour that lands inside the padded window
+            xs = slice(CHUNK - 1, CHUNK) if dx < 0 else slice(0, 1) if dx > 0 else slice(None)
+            ys = slice(CHUNK - 1, CHUNK) if dy < 0 else slice(0, 1) if dy > 0 else slice(None)
+            px = slice(0, 1) if dx < 0 else slice(CHUNK + 1, CHUNK + 2) if dx > 0 else slice(1, CHUNK + 1)
+            py = slice(0, 1) if dy < 0 else slice(CHUNK + 1, CHUNK + 2) if dy > 0 else slice(1, CHUNK + 1)
+            padded[px, py] = mask[xs, ys]
+    mines = padded[1:-1, 1:-1]
+    counts = count_adjacent(padded)[1:-1, 1:-1]
+    return np.where(mines, -1, counts).astype(np.int8)
+
+
+class Chunk:
+    __slots__ = ('value', 'state', 'revealed', 'dirty', 'resume')
+
+    def __init__(self, value, state=None, revealed=None, resume=None):
+        self.value = value
+        self.state = np.zeros((CHUNK, CHUNK), dtype=np.uint8) if state is None else state
+        self.revealed = np.zeros((CHUNK, CHUNK), dtype=np.bool_) if revealed is None else revealed
+        self.dirty = False      # player state changed since it was loaded
+        self.resume = resume    # tiles a flood fill reached while the chunk was away, or None
+
+
+class ChunkStore:
+    #player state of evicted chunks, one small compressed file per chunk
+    #mines are never stored, they are regenerated from the seed
+    #a file may also mark tiles where a flood fill stopped at the unloaded chunk,
+    #the fill goes on from them when the chunk is loaded again
+    def __init__(self, path=None):
+        self.tmp = tempfile.TemporaryDirectory(prefix='endless-') if path is None else None
+        self.path = self.tmp.name if path is None else path
+        os.makedirs(self.path, exist_ok=True)
+
+    def file(self, key):
+        return os.path.join(self.path, f"{key[0]}_{key[1]}.bin")
+
+    def save(self, key, state, revealed, resume=None):
+        data = state.tobytes() + revealed.tobytes()
+        if resume is not None:
+            data += resume.tobytes()
+        with open(self.file(key), 'wb') as f:
+            f.write(zlib.compress(data))
+
+    def park(self, key, cells):
+        #adds (x, y) chunk-local tiles to the chunk's resume marks
+        saved = self.load(key)
+        state, revealed, resume = saved if saved else (np.zeros((CHUNK, CHUNK), dtype=np.uint8),
+                                                       np.zeros((CHUNK, CHUNK), dtype=np.bool_), None)
+        if resume is None:
+            resume = np.zeros((CHUNK, CHUNK), dtype=np.bool_)
+        xs, ys = zip(*cells)
+        resume[list(xs), list(ys)] = True
+        self.save(key, state, revealed, resume)
+
+    def load(self, key):
+        try:
+            with open(self.file(key), 'rb') as f:
+                data = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        n = CHUNK * CHUNK
+        state = np.frombuffer(data[:n], dtype=np.uint8).reshape(CHUNK, CHUNK).copy()
+        revealed = np.frombuffer(data[n:2 * n], dtype=np.bool_).reshape(CHUNK, CHUNK).copy()
+        resume = np.frombuffer(data[2 * n:], dtype=np.bool_).reshape(CHUNK, CHUNK).copy() if len(data) > 2 * n else None
+        return state, revealed, resume
+
+    def close(self):
+        if self.tmp is not None:
+            self.tmp.cleanup()
+
+
+class EndlessWorld:
+    #an unbounded board with the same interface as engine.Game
+    #only the chunks around the view are in memory: a loader thread builds them
+    #(mines from the seed, player state from the store) and saves evicted ones,
+    #so neither generation nor disk access ever runs on the frame
+    replayable = False
+
+    def __init__(self, density, seed=None, store_path=None, clock=time.time):
+        self.density = density
+        self.seed = seed if seed is not None else int.from_bytes(os.urandom(8), 'little') >> 1
+        self.clock = clock
+        self.store = ChunkStore(store_path)
+        self.mines = 0
+        self.status = READY
+        self.start = None
+        self.start_time = None
+        self.end_time = None
+        self.clicks = 0
+        self.flag_count = 0
+        self.revealed_safe = 0
+
+        self.chunks = {}
+        self.requested = set()
+        self.unsaved = {}       # evicted chunks whose save has not reached the disk yet
+        self.pending = deque()  # tiles the flood fill still has to open
+        self.parked = {}        # chunk key -> fill tiles waiting for that chunk, only while it is near the view
+        self.moves = deque()    # clicks, flags and chords waiting for the chunk under them
+        self.wanted = None      # (cx0, cy0, cx1, cy1) chunk range kept in memory
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.loader = threading.Thread(target=self.load_chunks, daemon=True)
+        self.loader.start()
+
+    @property
+    def over(self):
+        return self.status == LOST
+
+    @property
+    def grid(self):
+        return self
+
+    @property
+    def busy(self):
+        #chunks on their way or a fill still opening tiles, update() has work next frame
+        #tiles and moves parked on chunks outside the view wait for it and do not count
+        return bool(self.requested or self.pending)
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time if self.end_time is not None else self.clock()
+        return end - self.start_time
+
+    #chunk loading, runs on the loader thread
+    def build(self, key):
+        value = chunk_values(self.seed, self.start, self.density, *key)
+        saved = self.store.load(key)
+        return Chunk(value, *saved) if saved else Chunk(value)
+
+    def load_chunks(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, key, data = job
+            if kind == 'save':
+                self.store.save(key, *data)
+                self.results.put(('saved', key, data))
+            elif kind == 'park':
+                self.store.park(key, data)
+            elif self.in_range(key, self.wanted):
+                self.results.put(('built', key, self.build(key)))
+            else:
+                #the view moved on before the loader got here
+                self.results.put(('skipped', key, None))
+
+    @staticmethod
+    def in_range(key, wanted):
+        return wanted is None or (wanted[0] <= key[0] <= wanted[2] and wanted[1] <= key[1] <= wanted[3])
+
+    #main thread side
+    def request(self, key):
+        if key not in self.chunks and key not in self.requested and self.start is not None:
+            self.requested.add(key)
+            self.jobs.put(('build', key, None))
+
+    def move_chunk(self, move, x, y):
+        #the chunk under a move, or None when it is not loaded yet: the move is then
+        #queued and made once the chunk arrives, after any moves queued before it
+        key = self.locate(x, y)[0]
+        chunk = self.chunks.get(key)
+        if chunk is None or self.moves:
+            self.moves.append((move, x, y))
+            self.request(key)
+            return None
+        return chunk
+
+    def loaded(self, key, chunk):
+        self.chunks[key] = chunk
+        parked = self.parked.pop(key, None)
+        if parked:
+            self.pending.extend(parked)
+        if chunk.resume is not None:
+            xs, ys = np.nonzero(chunk.resume)
+            self.pending.extend(zip((xs + key[0] * CHUNK).tolist(), (ys + key[1] * CHUNK).tolist()))
+            #saved again without the marks when it is evicted
+            chunk.resume = None
+            chunk.dirty = True
+
+    def park(self):
+        #fill tiles waiting on chunks the view has left go to the store with the chunk,
+        #so they cost no memory however far the player goes; a chunk with a load in
+        #flight keeps them here until the load is settled
+        for key in [k for k in self.parked if not self.in_range(k, self.wanted) and k not in self.requested]:
+            cells = [(x - key[0] * CHUNK, y - key[1] * CHUNK) for x, y in self.parked.pop(key)]
+            self.jobs.put(('park', key, cells))
+
+    def poll(self):
+        while True:
+            try:
+                kind, key, data = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'saved':
+                if self.unsaved.get(key) is data:
+                    del self.unsaved[key]
+            else:
+                self.requested.discard(key)
+                if kind == 'built' and key not in self.chunks:
+                    if key in self.unsaved:
+                        #evicted again while it was loading, the unsaved copy is newer
+                        state, revealed = self.unsaved[key]
+                        data = Chunk(data.value, state.copy(), revealed.copy(), data.resume)
+                        data.dirty = True
+                    self.loaded(key, data)
+
+    def replay_moves(self):
+        #makes the queued moves whose chunks have arrived, in the order they came in
+        moves, self.moves = self.moves, deque()
+        while moves and not self.over:
+            move, x, y = moves[0]
+            key = self.locate(x, y)[0]
+            if key not in self.chunks:
+                if self.in_range(key, self.wanted):
+                    self.request(key)
+                break
+            moves.popleft()
+            move(x, y)
+        if not self.over:
+            self.moves.extend(moves)
+
+    def update(self, x0, y0, x1, y1):
+        #once per frame with the visible tile range: loads, fills and evicts
+        self.poll()
+        if self.start is None:
+            return
+        cx0, cy0 = x0 // CHUNK - MARGIN, y0 // CHUNK - MARGIN
+        cx1, cy1 = (x1 - 1) // CHUNK + MARGIN, (y1 - 1) // CHUNK + MARGIN
+        self.wanted = (cx0, cy0, cx1, cy1)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.request((cx, cy))
+        self.replay_moves()
+        self.step(FILL_BUDGET)
+        self.park()
+        for key in [k for k in self.chunks if not (cx0 <= k[0] <= cx1 and cy0 <= k[1] <= cy1)]:
+            chunk = self.chunks.pop(key)
+            if chunk.dirty:
+                data = (chunk.state, chunk.revealed)
+                self.unsaved[key] = data
+                self.jobs.put(('save', key, data))
+
+    def regions(self, x0, y0, x1, y1):
+        #(chunk, visible part in chunk coordinates, same part in the x0, y0 based view)
+        for cx in range(x0 // CHUNK, (x1 - 1) // CHUNK + 1):
+            for cy in range(y0 // CHUNK, (y1 - 1) // CHUNK + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    continue
+                ax, bx = max(x0, cx * CHUNK), min(x1, cx * CHUNK + CHUNK)
+                ay, by = max(y0, cy * CHUNK), min(y1, cy * CHUNK + CHUNK)
+                local = (slice(ax - cx * CHUNK, bx - cx * CHUNK), slice(ay - cy * CHUNK, by - cy * CHUNK))
+                view = (slice(ax - x0, bx - x0), slice(ay - y0, by - y0))
+                yield chunk, local, view
+
+    def locate(self, x, y):
+        return (x // CHUNK, y // CHUNK), x % CHUNK, y % CHUNK
+
+    def is_flagged(self, x, y):
+        key, lx, ly = self.locate(x, y)
+        chunk = self.chunks.get(key)
+        return chunk is not None and chunk.state[lx, ly] == FLAGGED
+
+    def open_tile(self, x, y):
+        #reveals one tile, False if its chunk is not in memory yet
+        key, lx, ly = self.locate(x, y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return False
+        if chunk.revealed[lx, ly] or chunk.state[lx, ly] == FLAGGED:
+            return True
+        chunk.revealed[lx, ly] = True
+        chunk.state[lx, ly] = REVEALED
+        chunk.dirty = True
+        self.revealed_safe += 1
+        if chunk.value[lx, ly] == 0:
+            self.pending.extend((x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+        return True
+
+    def step(self, budget):
+        #continues the flood fill, tiles in chunks that are not loaded are parked on
+        #their chunk and go back in the queue when it arrives
+        for _ in range(min(budget, len(self.pending))):
+            x, y = self.pending.popleft()
+            if not self.open_tile(x, y):
+                #openings running past the kept chunks resume when the view gets there
+                key = self.locate(x, y)[0]
+                self.parked.setdefault(key, set()).add((x, y))
+                if self.in_range(key, self.wanted):
+                    self.request(key)
+
+    def click(self, x, y):
+        if self.over:
+            return self.status, NOTHING
+        if self.status == READY:
+            self.start = (x, y)
+            self.start_time = self.clock()
+            self.status = PLAYING
+        chunk = self.move_chunk(self.click, x, y)
+        if chunk is None:
+            return self.status, NOTHING
+        self.clicks += 1
+        _, lx, ly = self.locate(x, y)
+        if chunk.revealed[lx, ly] or chunk.state[lx, ly] == FLAGGED:
+            return self.status, NOTHING
+        if chunk.value[lx, ly] == -1:
+            chunk.revealed[lx, ly] = True
+            chunk.state[lx, ly] = MINE_HIT
+            chunk.dirty = True
+            self.status = LOST
+            self.end_time = self.clock()
+        else:
+            self.open_tile(x, y)
+            self.step(FILL_BUDGET)
+        #the fill may go on over the next frames, so there is no exact delta
+        return self.status, NOTHING
+
+    def flag(self, x, y):
+        if self.status != PLAYING:
+            return self.status, NOTHING
+        chunk = self.move_chunk(self.flag, x, y)
+        if chunk is None:
+            return self.status, NOTHING
+        _, lx, ly = self.locate(x, y)
+        if chunk.revealed[lx, ly]:
+            return self.status, NOTHING
+        self.clicks += 1
+        flagged = chunk.state[lx, ly] == FLAGGED
+        chunk.state[lx, ly] = SAFE if flagged else FLAGGED
+        chunk.dirty = True
+        self.flag_count += -1 if flagged else 1
+        return self.status, np.array([[x, y]], dtype=np.intp)
+
+    def chord(self, x, y):
+        if self.status != PLAYING:
+            return self.status, NOTHING
+        chunk = self.move_chunk(self.chord, x, y)
+        if chunk is None:
+            return self.status, NOTHING
+        _, lx, ly = self.locate(x, y)
+        value = chunk.value[lx, ly]
+        if not chunk.revealed[lx, ly] or value <= 0:
+            return self.status, NOTHING
+        around = [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+        if sum(self.is_flagged(nx, ny) for nx, ny in around) != value:
+            return self.status, NOTHING
+        clicks = self.clicks
+        for nx, ny in around:
+            self.click(nx, ny)
+            if self.over:
+                break
+        self.clicks = clicks + 1
+        return self.status, NOTHING
+
+    def hint(self):
+        return None
+
+    def close(self):
+        self.jobs.put(None)
+        self.loader.join()
+        self.store.close()
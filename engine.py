@@ -0,0 +1,154 @@
+import time
+
+import numpy as np
+
+from game_logic import NOTHING, generate, reveal, reveal_area, reveal_many, flag_tile
+from layout_cache import layouts
+from grid import Grid, FLAGGED
+from profiler import profiler
+from solver import Solver
+
+#game status
+READY = 'ready'      # waiting for the first click
+PLAYING = 'playing'
+WON = 'won'
+LOST = 'lost'
+
+
+class Game:
+    #one game of minesweeper with no pygame dependency
+    #click/flag/chord return (status, delta) where delta is an (N, 2) array of
+    #the (x, y) tiles whose state changed; the first click returns no delta,
+    #the board was fully hidden so everything revealed is new
+    #generator (no_guess.NoGuessGenerator) picks the seed on the first click when none is given
+    #the seed and the moves are enough to re-play a game, see replay.py
+    #cache keeps boards dealt from a given seed, for seeds that come round again
+    #(replays, benchmarks); callers trying throwaway seeds pass None
+    replayable = True
+
+    def __init__(self, width, height, mines, seed=None, clock=time.time, generator=None, cache=layouts):
+        self.width = width
+        self.height = height
+        self.mines = mines
+        self.seed = seed
+        self.clock = clock
+        self.generator = generator
+        self.cache = cache
+        self.grid = Grid(width, height)
+        self.status = READY
+        self.start_time = None
+        self.end_time = None
+        self.clicks = 0
+        self.solver = None
+        self.touched = None     # (x0, y0, x1, y1) around every tile changed so far, for the solver
+
+    @property
+    def over(self):
+        return self.status == WON or self.status == LOST
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time if self.end_time is not None else self.clock()
+        return end - self.start_time
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_flagged(self, x, y):
+        return self.grid.state[x, y] == FLAGGED
+
+    def click(self, x, y):
+        if self.over or not self.in_bounds(x, y):
+            return self.status, NOTHING
+        tile = self.grid.tile(x, y)
+        self.clicks += 1
+
+        if self.status == READY:
+            cache = self.cache if self.seed is not None else None
+            if self.seed is None and self.generator is not None:
+                self.seed = self.generator.generate(self.width, self.height, self.mines, x, y)
+            with profiler.section('initialise'):
+                _, self.seed = generate(self.grid, tile, self.mines, self.seed, cache)
+                #a huge opening is never listed tile by tile, its box is enough for the solver
+                self.touched = reveal_area(self.grid, tile, coords=False)
+            self.start_time = self.clock()
+            self.status = PLAYING
+            self.check_win()
+            return self.status, NOTHING
+
+        with profiler.section('reveal'):
+            result, delta = reveal(self.grid, tile)
+        if result == "mine":
+            self.finish(LOST)
+        else:
+            self.check_win()
+        return self.status, self.changed(delta)
+
+    def flag(self, x, y):
+        if self.status != PLAYING or not self.in_bounds(x, y):
+            return self.status, NOTHING
+        tile = self.grid.tile(x, y)
+        if not tile.clickable:
+            return self.status, NOTHING
+        self.clicks += 1
+        flag_tile(tile)
+        return self.status, np.array([[x, y]], dtype=np.intp)
+
+    def chord(self, x, y):
+        #reveal the hidden neighbours of a number whose flags are all placed
+        if self.status != PLAYING or not self.in_bounds(x, y):
+            return self.status, NOTHING
+        grid = self.grid
+        value = grid.value[x, y]
+        if not grid.revealed[x, y] or value <= 0:
+            return self.status, NOTHING
+        xs = slice(max(x - 1, 0), x + 2)
+        ys = slice(max(y - 1, 0), y + 2)
+        if np.count_nonzero(grid.state[xs, ys] == FLAGGED) != value:
+            return self.status, NOTHING
+
+        self.clicks += 1
+        #all neighbours in one combined fill, so overlapping openings are walked once
+        neighbours = [(nx, ny) for nx in range(xs.start, min(x + 2, self.width))
+                      for ny in range(ys.start, min(y + 2, self.height))]
+        with profiler.section('reveal'):
+            result, delta = reveal_many(grid, neighbours)
+        if result == "mine":
+            self.finish(LOST)
+        else:
+            self.check_win()
+        return self.status, self.changed(delta)
+
+    def changed(self, delta):
+        #keeps the hint solver's frontier in step with the board
+        if not len(delta):
+            return delta
+        if self.solver is not None:
+            self.solver.update(delta)
+        else:
+            low, high = delta.min(axis=0), delta.max(axis=0)
+            if self.touched is not None:
+                low = np.minimum(low, self.touched[:2])
+                high = np.maximum(high, self.touched[2:])
+            self.touched = (*low.tolist(), *high.tolist())
+        return delta
+
+    def hint(self):
+        #(kind, (x, y), mine probability), see Solver.hint
+        if self.status != PLAYING:
+            return None
+        if self.solver is None:
+            #only the area play has reached is searched for revealed tiles
+            self.solver = Solver(self.grid, self.mines, self.touched)
+        return self.solver.hint()
+
+    def check_win(self):
+        if self.grid.revealed_safe >= self.width * self.height - self.mines:
+            self.finish(WON)
+        return self.status == WON
+
+    def finish(self, status):
+        if not self.over:
+            self.status = status
+            self.end_time = self.clock()
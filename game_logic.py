@@ -1,10 +1,14 @@
-import pygame
 import random
-import sys
-import time
-import os
-import math
+import secrets
+from collections import deque
 
+import numpy as np
+
+from grid import Grid, FLAGGED, REVEALED, MINE_HIT
+from layout_cache import layouts
+
+NOTHING = np.empty((0, 2), dtype=np.intp)
+NOTHING.flags.writeable = False
 
 
 class Tile:
@@ -18,60 +22,219 @@ class Tile:
     def set_value(self, n):
         self.value = n
 
-def mines(start_tile, tiles, n):
+def _sample_ranks(count, n, rng):
+    #partial Fisher-Yates: n distinct picks from range(count) in O(n)
+    #only the swapped slots are stored, the rest of the range is implicit
+    swapped = {}
+    picks = []
+    for i in range(n):
+        j = rng.randrange(i, count)
+        picks.append(swapped.get(j, j))
+        swapped[j] = swapped.get(i, i)
+    return picks
+
+
+#boards with more tiles than this are generated in chunks of this many tiles,
+#so the temporaries stay small next to the Grid itself
+#smaller boards keep the original sampler, so their seeds still give the same boards
+CHUNK = 1 << 20
+
+
+def _place_chunked(flat, blocked, allowed, n, rng):
+    #numpy version of the sampler for very large boards: the mines falling in each
+    #chunk of ranks are drawn from the hypergeometric distribution, then placed
+    #uniformly inside the chunk
+    gen = np.random.default_rng(rng.getrandbits(128))
+    left = n
+    for start in range(0, allowed, CHUNK):
+        size = min(CHUNK, allowed - start)
+        rest = allowed - start - size
+        k = left if rest == 0 or left == 0 else int(gen.hypergeometric(size, rest, left))
+        if k:
+            cells = start + gen.choice(size, k, replace=False).astype(np.intp)
+            for b in blocked:
+                cells[cells >= b] += 1
+            flat[cells] = -1
+            left -= k
+
+
+def mines(start_tile, tiles, n, rng=random):
     w = len(tiles)
     h = len(tiles[0])
-    mines_set = set()
 
     sx, sy = start_tile.x, start_tile.y
-    blocked = set([(sx + temp_x, sy + temp_y) for temp_x in [-1, 0, 1] for temp_y in [-1, 0, 1] 
-                          if 0 <= sx + temp_x < w and 0 <= sy + temp_y < h])
+    blocked = sorted((sx + temp_x) * h + sy + temp_y for temp_x in [-1, 0, 1] for temp_y in [-1, 0, 1]
+                     if 0 <= sx + temp_x < w and 0 <= sy + temp_y < h)
 
-    while len(mines_set) < n:
-        x = random.randint(0, w - 1)
-        y = random.randint(0, h - 1)
-        if (x, y) in blocked:
-            continue
-        mines_set.add((x, y))
+    allowed = w * h - len(blocked)
+    if not 0 <= n <= allowed:
+        raise ValueError(f"Cannot place {n} mines on a {w}x{h} board: "
+                         f"only {allowed} tiles are outside the first click's safe zone")
+
+    if isinstance(tiles, Grid) and w * h > CHUNK:
+        _place_chunked(tiles.value.reshape(-1), blocked, allowed, n, rng)
+        tiles.recount()
+        return tiles
 
-    for (x, y) in mines_set:
-        tiles[x][y].set_value(-1)
+    #sample ranks among the allowed tiles, then skip over the blocked ones
+    cells = np.array(_sample_ranks(allowed, n, rng), dtype=np.intp)
+    for b in blocked:
+        cells[cells >= b] += 1
+
+    if isinstance(tiles, Grid):
+        tiles.value.reshape(-1)[cells] = -1
+        tiles.recount()
+    else:
+        for c in cells.tolist():
+            tiles[c // h][c % h].set_value(-1)
 
     return tiles
 
 
-def recursive_fill(tiles, tile):
-    #reveals adjacent tiles if the current tile value = 0
-    #Clearing
-    #
+def _fill_grid(grid, seeds, coords=True):
+    #scanline fill over Grid columns, started from every (x, y) in seeds at once
+    #returns the (N, 2) revealed tiles, or with coords=False only their bounding box
+    #(x0, y0, x1, y1) or None, so a huge opening never needs 16 bytes per tile
+    #each touched column is copied once into two bytearrays so runs of zeros
+    #can be found with bytearray.find/rfind instead of per-tile python calls:
+    #  blocked[y] = 1 if the tile stops the fill (number, mine, revealed, flagged)
+    #  open_[y]   = 1 if the tile is still hidden and not flagged
+    values, revealed, state = grid.value, grid.revealed, grid.state
+    w, h = grid.width, grid.height
+    #a tile given twice is revealed and counted once
+    seeds = [(x, y) for x, y in dict.fromkeys(map(tuple, seeds)) if not revealed[x, y] and state[x, y] != FLAGGED]
+    if not seeds:
+        return NOTHING if coords else None
+    if all(values[x, y] != 0 for x, y in seeds):
+        #only numbers, the most common click and chord, skips the column copies
+        cells = np.array(seeds, dtype=np.intp)
+        xs, ys = cells[:, 0], cells[:, 1]
+        revealed[xs, ys] = True
+        state[xs, ys] = REVEALED
+        grid.revealed_safe += len(cells) - int(np.count_nonzero(values[xs, ys] == -1))
+        return cells if coords else (*cells.min(axis=0).tolist(), *cells.max(axis=0).tolist())
+
+    columns = {}
+
+    def column(cx):
+        col = columns.get(cx)
+        if col is None:
+            was_open = ~revealed[cx] & (state[cx] != FLAGGED)
+            blocked = bytearray(((values[cx] != 0) | ~was_open).tobytes())
+            col = columns[cx] = (blocked, bytearray(was_open.tobytes()), was_open)
+        return col
+
+    def zero_run(blocked, z):
+        #the maximal run of fillable zeros around z, marked as taken
+        lo = blocked.rfind(1, 0, z) + 1
+        hi = blocked.find(1, z)
+        if hi < 0:
+            hi = h
+        blocked[lo:hi] = bytes([1]) * (hi - lo)
+        return lo, hi
+
+    stack = []
+    for x, y in seeds:
+        blocked, open_, _ = column(x)
+        if not open_[y]:
+            #revealed, flagged, or already reached from an earlier seed
+            continue
+        if values[x, y] != 0:
+            open_[y] = 0
+            continue
+        lo, hi = zero_run(blocked, y)
+        open_[max(lo - 1, 0):min(hi + 1, h)] = bytes(min(hi + 1, h) - max(lo - 1, 0))
+        stack.append((x, lo, hi))
+
+    while stack:
+        cx, lo, hi = stack.pop()
+        a, b = max(lo - 1, 0), min(hi + 1, h)
+        for nx in (cx - 1, cx + 1):
+            if not 0 <= nx < w:
+                continue
+            blocked, open_, _ = column(nx)
+            #zero runs touching the span become new spans
+            i = blocked.find(0, a, b)
+            while i >= 0:
+                rlo, rhi = zero_run(blocked, i)
+                ra, rb = max(rlo - 1, 0), min(rhi + 1, h)
+                open_[ra:rb] = bytes(rb - ra)
+                stack.append((nx, rlo, rhi))
+                i = blocked.find(0, rhi, b) if rhi < b else -1
+            #numbers touching the span are revealed
+            open_[a:b] = bytes(b - a)
+
+    found = []
+    box = None
+    for cx, (_, open_, was_open) in columns.items():
+        opened = was_open & ~np.frombuffer(open_, dtype=np.bool_)
+        if not coords:
+            count = int(np.count_nonzero(opened))
+            if count:
+                revealed[cx] |= opened
+                state[cx][opened] = REVEALED
+                grid.revealed_safe += count - int(np.count_nonzero(opened & (values[cx] == -1)))
+                lo, hi = int(opened.argmax()), h - 1 - int(opened[::-1].argmax())
+                box = (cx, lo, cx, hi) if box is None else (
+                    min(box[0], cx), min(box[1], lo), max(box[2], cx), max(box[3], hi))
+            continue
+        ys = np.flatnonzero(opened)
+        if len(ys):
+            revealed[cx, ys] = True
+            state[cx, ys] = REVEALED
+            grid.revealed_safe += len(ys) - int(np.count_nonzero(values[cx, ys] == -1))
+            found.append((cx, ys))
+    return _collect(found) if coords else box
+
+
+def _collect(found):
+    if not found:
+        return NOTHING
+    xs = np.concatenate([np.full(len(ys), cx, dtype=np.intp) for cx, ys in found])
+    ys = np.concatenate([ys for _, ys in found])
+    return np.column_stack((xs, ys))
+
+
+def _fill_tiles(tiles, tile):
+    #queue based fill for the plain list-of-lists board
     w = len(tiles)
     h = len(tiles[0])
-    x, y = tile.x, tile.y
+    found = []
+    queue = deque([tile])
+    while queue:
+        t = queue.popleft()
+        #already revealed (clickable=false or a flag
+        if not t.clickable or t.state == 'flagged':
+            continue
+        t.clickable = False
+        t.state = 'revealed'
+        found.append((t.x, t.y))
 
-    #already revealed (clickable=false or a flag
-    if not tile.clickable or tile.state == 'flagged':
-        return tiles
-    
-    #current tile
-    tile.clickable = False
-    tile.state = 'revealed'
+        #number (1-8) or a mine (-1), stop
+        if t.value != 0:
+            continue
+        for temp_x in [-1, 0, 1]:
+            for temp_y in [-1, 0, 1]:
+                nx, ny = t.x + temp_x, t.y + temp_y
+                if 0 <= nx < w and 0 <= ny < h:
+                    n = tiles[nx][ny]
+                    if n.clickable and n.state != 'flagged':
+                        queue.append(n)
+    return np.array(found, dtype=np.intp).reshape(-1, 2)
 
-    #number (1-8) or a mine (-1), stop
-    if tile.value != 0:
-        return tiles
-    
-    #neighbors if value is 0
-    for temp_x in [-1, 0, 1]:
-        for temp_y in [-1, 0, 1]:
-            if temp_x == 0 and temp_y == 0:
-                continue
 
-            nx, ny = x + temp_x, y + temp_y
+def reveal_area(tiles, tile, coords=True):
+    #reveals the tile and, if its value = 0, the whole connected opening
+    #returns an (N, 2) array of the newly revealed (x, y) coordinates, or with
+    #coords=False on a Grid just their bounding box (x0, y0, x1, y1), None if none
+    if isinstance(tiles, Grid):
+        return _fill_grid(tiles, [(tile.x, tile.y)], coords)
+    return _fill_tiles(tiles, tile)
 
-            if 0 <= nx < w and 0 <= ny < h:
-                n = tiles[nx][ny]
-                recursive_fill(tiles, n)
 
+def recursive_fill(tiles, tile):
+    #kept for callers of the old API, the fill itself is iterative
+    reveal_area(tiles, tile, coords=False)
     return tiles
 
 def find_number(tiles, tile):
@@ -94,41 +257,125 @@ def find_number(tiles, tile):
                     c += 1
     return c
 
+def count_adjacent(mask):
+    #number of set neighbours for every cell of a 2D bool mask
+    #sum of the 8 shifted copies of the padded mask, values fit in int8
+    w, h = mask.shape
+    padded = np.zeros((w + 2, h + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = mask
+    counts = np.zeros((w, h), dtype=np.int8)
+    for dx in (0, 1, 2):
+        for dy in (0, 1, 2):
+            if dx != 1 or dy != 1:
+                counts += padded[dx:dx + w, dy:dy + h]
+    return counts
+
+
 def compute_numbers(tiles):
     #sets the numerical value for all non-mine tiles
+    if isinstance(tiles, Grid):
+        #in bands of columns, each band reads one extra column on either side
+        values = tiles.value
+        w, h = values.shape
+        band = max(1, CHUNK // h)
+        for x0 in range(0, w, band):
+            x1 = min(x0 + band, w)
+            lo, hi = max(x0 - 1, 0), min(x1 + 1, w)
+            counts = count_adjacent(values[lo:hi] == -1)[x0 - lo:x1 - lo]
+            block = values[x0:x1]
+            np.copyto(block, counts, where=block != -1)
+        return tiles
+
     for row in tiles:
         for t in row:
             if (t.value != -1):
                 t.value = find_number(tiles, t)
     return tiles
 
-def initialise(tiles, click, n, seed=None):
-    #gen/set seed
-    if seed is None: seed = int(time.time())
-    random.seed(seed)
+def new_seed():
+    #from the OS, so games started in the same second still differ
+    return secrets.randbits(63)
+
+def board_rng(seed, w, h, n, click):
+    #private generator for one board, the global random module is never touched
+    return random.Random(f"{seed}:{w}x{h}:{n}:{click.x},{click.y}")
 
-    #Reveal the board
-    tiles = mines(click, tiles, n)
-    tiles = compute_numbers(tiles)
+def initialise(tiles, click, n, seed=None, cache=layouts):
+    #deals the board and opens the first click
+    tiles, seed = generate(tiles, click, n, seed, cache)
     tiles = recursive_fill(tiles, click)
     return tiles,seed
 
-def reveal_tile(tiles, tile):
+def generate(tiles, click, n, seed=None, cache=layouts):
+    #mines and numbers for the board, nothing revealed
+    #gen/set seed, a fresh seed can never come round again so it skips the cache
+    if seed is None:
+        seed = new_seed()
+        cache = None
+    w = len(tiles)
+    h = len(tiles[0])
+
+    #same seed, size, mine count and first click -> same board
+    key = (seed, w, h, n, click.x, click.y)
+    values = cache.get(key) if cache is not None and isinstance(tiles, Grid) else None
+    if values is not None:
+        tiles.value[:] = values
+        tiles.recount()
+    else:
+        tiles = mines(click, tiles, n, board_rng(seed, w, h, n, click))
+        tiles = compute_numbers(tiles)
+        if cache is not None and isinstance(tiles, Grid):
+            cache.put(key, tiles.value)
+    return tiles,seed
+
+def reveal(tiles, tile):
+    #reveal_tile that also returns the (N, 2) array of newly revealed tiles
     if not tile.clickable or tile.state == 'flagged':
-        return "ok"
+        return "ok", NOTHING
 
     if tile.value == -1:
         tile.clickable = False
         tile.state = 'mine_hit'
-        return "mine"
+        return "mine", np.array([[tile.x, tile.y]], dtype=np.intp)
 
-    if tile.value == 0:
-        recursive_fill(tiles, tile)
+    return "ok", reveal_area(tiles, tile)
+
+def reveal_many(tiles, cells):
+    #reveals several (x, y) tiles as one move, e.g. a chord: mines are hit, every
+    #other tile goes through a single combined fill
+    #returns ("ok"|"mine", delta)
+    hit = []
+    seeds = []
+    if isinstance(tiles, Grid):
+        revealed, state, values = tiles.revealed, tiles.state, tiles.value
+        for x, y in cells:
+            if revealed[x, y] or state[x, y] == FLAGGED:
+                continue
+            if values[x, y] == -1:
+                revealed[x, y] = True
+                state[x, y] = MINE_HIT
+                hit.append((x, y))
+            else:
+                seeds.append((x, y))
+        delta = _fill_grid(tiles, seeds) if seeds else NOTHING
     else:
-        tile.clickable = False
-        tile.state = 'revealed'
+        for x, y in cells:
+            tile = tiles[x][y]
+            if not tile.clickable or tile.state == 'flagged':
+                continue
+            if tile.value == -1:
+                tile.clickable = False
+                tile.state = 'mine_hit'
+                hit.append((x, y))
+            else:
+                seeds.append((x, y))
+        delta = np.concatenate([NOTHING] + [_fill_tiles(tiles, tiles[x][y]) for x, y in seeds])
+    if hit:
+        delta = np.concatenate((np.array(hit, dtype=np.intp), delta))
+    return ("mine" if hit else "ok"), delta
 
-    return "ok"
+def reveal_tile(tiles, tile):
+    return reveal(tiles, tile)[0]
 
 def flag_tile(tile):
     if tile.clickable:
@@ -0,0 +1,158 @@
+import numpy as np
+
+#tile state codes, stored one byte per tile
+SAFE = 0
+FLAGGED = 1
+REVEALED = 2
+MINE_HIT = 3
+FLOWER = 4
+
+STATE_NAMES = ('safe', 'flagged', 'revealed', 'mine_hit', 'flower')
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+
+class TileView:
+    #Tile-compatible handle onto one cell of a Grid, created on demand
+    __slots__ = ('grid', 'x', 'y')
+
+    def __init__(self, grid, x, y):
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    @property
+    def value(self):
+        return int(self.grid.value[self.x, self.y])
+
+    @value.setter
+    def value(self, n):
+        self.set_value(n)
+
+    def set_value(self, n):
+        grid = self.grid
+        old = int(grid.value[self.x, self.y])
+        if (old == -1) != (n == -1):
+            delta = 1 if n == -1 else -1
+            grid.mine_count += delta
+            if grid.revealed[self.x, self.y]:
+                grid.revealed_safe -= delta
+        grid.value[self.x, self.y] = n
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.grid.state[self.x, self.y]]
+
+    @state.setter
+    def state(self, name):
+        grid = self.grid
+        code = STATE_CODES[name]
+        old = int(grid.state[self.x, self.y])
+        if old != code:
+            grid.flag_count += (code == FLAGGED) - (old == FLAGGED)
+            grid.state[self.x, self.y] = code
+
+    @property
+    def clickable(self):
+        return not self.grid.revealed[self.x, self.y]
+
+    @clickable.setter
+    def clickable(self, flag):
+        grid = self.grid
+        if grid.revealed[self.x, self.y] == flag:
+            grid.revealed[self.x, self.y] = not flag
+            if grid.value[self.x, self.y] != -1:
+                grid.revealed_safe += -1 if flag else 1
+
+    def __eq__(self, other):
+        return (isinstance(other, TileView) and self.grid is other.grid
+                and self.x == other.x and self.y == other.y)
+
+    def __hash__(self):
+        return hash((id(self.grid), self.x, self.y))
+
+    def __repr__(self):
+        return f"TileView({self.x}, {self.y}, value={self.value}, state={self.state!r})"
+
+
+class _Column:
+    #grid[x] -> column, so grid[x][y] works like the old list of lists
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __len__(self):
+        return self.grid.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.grid.height:
+            raise IndexError(y)
+        return TileView(self.grid, self.x, y)
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield TileView(self.grid, self.x, y)
+
+
+class Grid:
+    #compact board: one contiguous typed array per field, indexed [x, y]
+    #the counters are kept up to date by TileView and game_logic, so reading
+    #them is O(1); code writing to the arrays directly calls recount()
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.value = np.zeros((width, height), dtype=np.int8)     # -1 mine, 0-8 adjacent mines
+        self.state = np.zeros((width, height), dtype=np.uint8)    # SAFE, FLAGGED, ...
+        self.revealed = np.zeros((width, height), dtype=np.bool_) # not clickable any more
+        self.flag_count = 0
+        self.revealed_safe = 0
+        self.mine_count = 0
+
+    @property
+    def flagged(self):
+        #derived from the state codes so there is a single source of truth
+        return self.state == FLAGGED
+
+    @property
+    def mines(self):
+        return self.value == -1
+
+    @property
+    def nbytes(self):
+        return self.value.nbytes + self.state.nbytes + self.revealed.nbytes
+
+    def tile(self, x, y):
+        return TileView(self, x, y)
+
+    @property
+    def mines_left(self):
+        return max(0, self.mine_count - self.flag_count)
+
+    @property
+    def safe_left(self):
+        return self.width * self.height - self.mine_count - self.revealed_safe
+
+    def recount(self):
+        #full rescan of the counters after bulk array edits
+        self.flag_count = self.count_flags()
+        self.revealed_safe = self.count_revealed_safe()
+        self.mine_count = int(np.count_nonzero(self.value == -1))
+
+    def count_flags(self):
+        return int(np.count_nonzero(self.state == FLAGGED))
+
+    def count_revealed_safe(self):
+        return int(np.count_nonzero(self.revealed & (self.value != -1)))
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            raise IndexError(x)
+        return _Column(self, x)
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield _Column(self, x)
@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+#default memory budget for cached boards
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LayoutCache:
+    #LRU cache of generated value grids (mines and numbers) bounded by total bytes
+    #keys are (seed, width, height, mines, click x, click y)
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            values = self.entries.get(key)
+            if values is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return values
+
+    def put(self, key, values):
+        if values.nbytes > self.max_bytes:
+            return
+        values = values.copy()
+        values.flags.writeable = False
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self.entries[key] = values
+            self.nbytes += values.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+#shared by every game in the process
+layouts = LayoutCache()
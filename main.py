@@ -1,17 +1,45 @@
+import argparse
+import math
 import pygame
 import sys
-import time
-from game_logic import initialise, reveal_tile, flag_tile
+from engine import LOST
+from replay import CLICK, FLAG, CHORD
 import settings
 from board import MineSweeperBoard
 import file_manager
+from profiler import profiler
+
+#arrow key scrolling, pixels per frame
+PAN_SPEED = 20
+
+#frame cap, and how often the event-driven loop wakes while the view scrolls
+FPS = 60
+FRAME_TIME = 1 / FPS
+
+
+def parse_board(text):
+    #WIDTHxHEIGHTxMINES for the Custom board
+    try:
+        w, h, m = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHTxMINES, got {text!r}")
+    limit = settings.max_board_size
+    if not (1 <= w <= limit and 1 <= h <= limit):
+        raise argparse.ArgumentTypeError(f"width and height must be between 1 and {limit}")
+    if not 0 <= m <= max(w * h - 9, 0):
+        raise argparse.ArgumentTypeError(f"a {w}x{h} board takes at most {max(w * h - 9, 0)} mines")
+    return w, h, m
+
 
 class MineSweeperGame(MineSweeperBoard):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, difficulty='Easy'):
+        super().__init__(difficulty)
+        self.panning = False
     def handle_click(self, pos, button):
-        x, y = pos
-
+        if self.stats_open:
+            #any click closes the stats screen
+            self.toggle_stats()
+            return
         if self.game_over:
             if self.restart_button and self.restart_button.collidepoint(pos) and button == 1:
                 self.reset_game()
@@ -36,85 +64,134 @@ class MineSweeperGame(MineSweeperBoard):
                 self.dropdown_active = not self.dropdown_active
                 return
 
-        col = x // self.tile_size
-        row = (y - 50) // self.tile_size
-        
-        if not (0 <= col < self.GRID_W and 0 <= row < self.GRID_H):
+        tile = self.tile_at(pos)
+        if tile is None:
             return
+        col, row = tile
+        self.hint = None
 
-        tile = self.tiles[col][row]
-        
         if self.is_initial_click:
             if button == 1:
                 if not self.music_started:
-                    try:
-                        pygame.mixer.music.play(-1)
-                        self.music_started = True
-                    except:
-                        pass
-                
-                self.tiles, seed = initialise(self.tiles, tile, self.mc)
-                file_manager.save_game_seed(seed)
-
+                    self.audio.play_music()
+                    self.music_started = True
                 
-                self.is_initial_click = False
-                self.start_time = time.time()
-                self.timer_running = True
-                
-                if tile.value > 0 and tile.clickable:
-                    tile.clickable = False
-                    tile.state = 'revealed'
+                self.game.click(col, row)
+                self.recorder.record(self.game, CLICK, col, row)
+                file_manager.save_game_seed(self.game.seed)
+                self.check_win()
             return
 
-        if button == 1:
-            if tile.state == 'flagged':
+        left, _, right = pygame.mouse.get_pressed()[:3]
+        if button == 2 or (button in (1, 3) and left and right):
+            #middle click, or both buttons held, on a number whose flags are all placed
+            status, _ = self.game.chord(col, row)
+            self.recorder.record(self.game, CHORD, col, row)
+            if status == LOST:
+                self.audio.play('explode')
+                self.record_game()
+            else:
+                self.check_win()
+
+        elif button == 1:
+            if self.game.is_flagged(col, row):
                 return
             
-            result = reveal_tile(self.tiles, tile)
-            if result == "mine":
-                if self.boom:
-                    self.boom.play()
-                self.game_over = True
-                self.timer_running = False
+            status, _ = self.game.click(col, row)
+            self.recorder.record(self.game, CLICK, col, row)
+            if status == LOST:
+                self.audio.play('explode')
+                self.record_game()
             else:
                 self.check_win()
         
         elif button == 3:
-            if self.sound_flag:
-                self.sound_flag.play()
-            flag_tile(tile)
+            self.audio.play('flag')
+            self.game.flag(col, row)
+            self.recorder.record(self.game, FLAG, col, row)
             self.update_mine_counter()
         
+    def next_events(self):
+        #polls every frame, or with event_driven sleeps until input arrives or the
+        #scene is due to change (timer second, flower frame, chunk loading, panning)
+        if not settings.event_driven:
+            return pygame.event.get()
+        wait = FRAME_TIME if self.panning else self.next_update()
+        if wait is None:
+            first = pygame.event.wait()
+        else:
+            #a timeout of 0 would wait forever, and rounding up lands just past a second boundary
+            first = pygame.event.wait(max(1, math.ceil(wait * 1000)))
+        events = pygame.event.get()
+        if first.type != pygame.NOEVENT:
+            events.insert(0, first)
+        return events
+
     def run(self):
         running = True
         while running:
-            if self.timer_running and not self.game_over:
-                self.current_time = time.time() - self.start_time
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.handle_click(event.pos, event.button)
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r and self.game_over:
-                        self.reset_game()
+            events = self.next_events()
+            profiler.begin_frame()
+            with profiler.section('events'):
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.WINDOWEXPOSED:
+                        self.full_redraw = True
+                    elif event.type == pygame.MOUSEBUTTONDOWN and event.button <= 3:
+                        self.handle_click(event.pos, event.button)
+                    elif event.type == pygame.MOUSEWHEEL and not self.dropdown_active:
+                        self.zoom(event.y, pygame.mouse.get_pos())
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_r and self.game_over:
+                            self.reset_game()
+                        elif event.key == pygame.K_h and not self.game_over:
+                            self.show_hint()
+                        elif event.key == pygame.K_s:
+                            self.toggle_stats()
+                        elif event.key == pygame.K_F3:
+                            self.toggle_profile()
+                        elif event.key == pygame.K_F4 and profiler.enabled:
+                            self.save_trace()
+
+            with profiler.section('tick'):
+                self.tick()
+
+                keys = pygame.key.get_pressed()
+                dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+                dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+                self.panning = bool(dx or dy)
+                if self.panning:
+                    self.pan(dx * PAN_SPEED, dy * PAN_SPEED)
                 
-            self.screen.fill(settings.COLOR_REVEALED_LIGHT)
-            self.draw_board()
-            self.draw_status_bar()
-            
-            if self.game_over:
-                self.draw_pop_up()
+            if settings.incremental_render:
+                dirty = self.draw_frame_dirty()
+                if dirty:
+                    with profiler.section('flip'):
+                        pygame.display.update(dirty)
             else:
-                 self.restart_button = None 
-
-            pygame.display.flip()
-            self.clock.tick(60)
+                self.draw_frame()
+                with profiler.section('flip'):
+                    pygame.display.flip()
+            profiler.end_frame()
+            self.clock.tick(FPS)
 
+        self.recorder.close()
+        self.records.close()
+        if profiler.enabled:
+            self.save_trace()
+        self.close_world()
+        if self.generator is not None:
+            self.generator.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == '__main__':
-    game = MineSweeperGame()
+    parser = argparse.ArgumentParser(description="Minesweeper")
+    parser.add_argument('board', nargs='?', type=parse_board,
+                        help="play a custom board, e.g. 1000x1000x150000 (up to 10000x10000)")
+    args = parser.parse_args()
+    if args.board:
+        settings.custom_board = args.board
+    game = MineSweeperGame('Custom' if args.board else 'Easy')
     game.run()
\ No newline at end of file
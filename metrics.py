@@ -0,0 +1,132 @@
+import numpy as np
+
+from game_logic import CHUNK, count_adjacent
+
+
+def _runs(mask):
+    #maximal runs of set cells down each column: (column, start, end) arrays, end exclusive,
+    #in the same order as np.flatnonzero(mask)
+    edges = np.diff(np.pad(mask.view(np.int8), ((0, 0), (1, 1))), axis=1)
+    #down a column the changes alternate start, end, start, end
+    xs, ys = np.nonzero(edges)
+    return xs[0::2], ys[0::2], ys[1::2]
+
+
+def _touching(columns, starts, ends, h):
+    #(a, b) index pairs of runs in neighbouring columns that touch, diagonals included
+    key = h + 2
+    start_keys = columns * key + starts
+    end_keys = columns * key + ends
+    #run b in the next column touches run a when b.start <= a.end and b.end >= a.start
+    lo = np.searchsorted(end_keys, (columns + 1) * key + starts, side='left')
+    hi = np.searchsorted(start_keys, (columns + 1) * key + ends, side='right')
+    counts = np.maximum(hi - lo, 0)
+    a = np.repeat(np.arange(len(columns)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    b = np.repeat(lo, counts) + offsets
+    return a, b
+
+
+def _roots(n, a, b):
+    #union-find over n nodes and the (a, b) edges, vectorized: hook the larger root
+    #under the smaller, compress paths, until no edge joins two roots
+    parent = np.arange(n)
+    while len(a):
+        ra, rb = parent[a], parent[b]
+        split = ra != rb
+        if not split.any():
+            break
+        ra, rb = ra[split], rb[split]
+        a, b = a[split], b[split]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+
+def label(mask):
+    #8-connected components of a 2D bool mask: (labels, count), labels 1..count, 0 outside
+    #works on column runs rather than tiles, so the python-level loops are per
+    #union-find round, not per tile
+    mask = np.ascontiguousarray(mask, dtype=np.bool_)
+    w, h = mask.shape
+    labels = np.zeros((w, h), dtype=np.int32)
+    columns, starts, ends = _runs(mask)
+    if not len(columns):
+        return labels, 0
+    roots = _roots(len(columns), *_touching(columns, starts, ends, h))
+    _, run_labels = np.unique(roots, return_inverse=True)
+    labels.reshape(-1)[np.flatnonzero(mask)] = np.repeat(run_labels.astype(np.int32) + 1, ends - starts)
+    return labels, int(run_labels.max()) + 1
+
+
+class _Components:
+    #8-connected components of a mask fed one band of columns at a time, left to right,
+    #so only one band's runs are in memory: each band is labelled with the column
+    #before it, whose runs carry the ids they got in the previous band, and the ids
+    #a component gets in several bands are joined at the end
+    def __init__(self):
+        self.count = 0           # ids handed out so far
+        self.sizes = []          # tiles per id, the overlap column counted in its own band
+        self.joins = []          # (ids, ids) pairs that are one component
+        self.edge = None         # the previous band's last column and the ids of its runs
+
+    def add(self, mask):
+        if self.edge is not None:
+            column, edge_ids = self.edge
+            mask = np.concatenate((column[None], mask))
+        h = mask.shape[1]
+        columns, starts, ends = _runs(mask)
+        _, comp = np.unique(_roots(len(columns), *_touching(columns, starts, ends, h)), return_inverse=True)
+        found = int(comp.max()) + 1 if len(comp) else 0
+        ids = self.count + comp
+        lengths = ends - starts
+        if self.edge is not None:
+            first = columns == 0
+            self.joins.append((ids[first], edge_ids))
+            lengths = np.where(first, 0, lengths)
+        self.sizes.append(np.bincount(comp, weights=lengths, minlength=found))
+        self.count += found
+        self.edge = (mask[-1].copy(), ids[columns == mask.shape[0] - 1])
+
+    def result(self):
+        #(number of components, tiles in each)
+        if not self.count:
+            return 0, np.zeros(0, dtype=np.int64)
+        a = np.concatenate([a for a, _ in self.joins]) if self.joins else np.zeros(0, dtype=np.intp)
+        b = np.concatenate([b for _, b in self.joins]) if self.joins else np.zeros(0, dtype=np.intp)
+        _, component = np.unique(_roots(self.count, a, b), return_inverse=True)
+        sizes = np.bincount(component, weights=np.concatenate(self.sizes))
+        return len(sizes), sizes.astype(np.int64)
+
+
+def board_metrics(values):
+    #difficulty of a board from its [x, y] tile values (-1 mine, 0-8 numbers):
+    #  openings      regions of zeros, each cleared by one click
+    #  islands       groups of touching numbers that no opening reveals
+    #  bbbv          3BV, the clicks a perfect player needs: openings plus those lone numbers
+    #  opening_sizes zero tiles in each opening
+    #works through bands of columns like compute_numbers, so a huge board never
+    #needs more than one band's worth of temporaries
+    w, h = values.shape
+    band = max(1, CHUNK // h)
+    zeros, islands = _Components(), _Components()
+    lone_count = 0
+    for x0 in range(0, w, band):
+        x1 = min(x0 + band, w)
+        lo, hi = max(x0 - 1, 0), min(x1 + 1, w)
+        zero = values[lo:hi] == 0
+        lone = (values[x0:x1] > 0) & (count_adjacent(zero)[x0 - lo:x1 - lo] == 0)
+        zeros.add(zero[x0 - lo:x1 - lo])
+        islands.add(lone)
+        lone_count += int(np.count_nonzero(lone))
+    openings, sizes = zeros.result()
+    return {
+        'bbbv': openings + lone_count,
+        'openings': openings,
+        'islands': islands.result()[0],
+        'opening_sizes': sizes,
+    }
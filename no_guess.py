@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from engine import Game, PLAYING, WON
+from game_logic import new_seed
+from solver import Solver
+
+#candidate seeds a worker checks per task, so one round trip covers several boards
+BATCH = 8
+
+
+def solve(game):
+    #plays a started game using deductions only, never guessing
+    #returns True if that clears the board
+    solver = game.solver = Solver(game.grid, game.mines)
+    while game.status == PLAYING:
+        solver.deduce()
+        if not solver.known_safe:
+            #the single-number and subset rules are stuck, ask the full enumeration
+            #for tiles that are safe in every layout
+            probs, _ = solver.probabilities()
+            certain = [cell for cell, p in probs.items() if p == 0.0]
+            if not certain:
+                return False
+            solver.mark(certain, False, set())
+        for cell in sorted(solver.known_safe):
+            game.click(*cell)
+    return game.status == WON
+
+
+def no_guess(width, height, mines, x, y, seed):
+    #the board is fully determined by the seed and first click, see game_logic.initialise
+    game = Game(width, height, mines, seed=seed, cache=None)
+    game.click(x, y)
+    return solve(game)
+
+
+def search(width, height, mines, x, y, count):
+    #checks up to count fresh seeds, returns (the first no-guess seed or None, seeds checked)
+    for tried in range(1, count + 1):
+        seed = new_seed()
+        if no_guess(width, height, mines, x, y, seed):
+            return seed, tried
+    return None, count
+
+
+class NoGuessGenerator:
+    #finds seeds whose board can be cleared from the first click without guessing
+    #candidates are checked speculatively on a process pool and the first valid
+    #one wins; the game then rebuilds the board from that seed as usual, so
+    #replays and saved seeds need nothing extra
+    def __init__(self, workers=None, timeout=10.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.pool = None
+        self.tried = 0          # candidates checked by the last generate()
+
+    def start(self):
+        #spawn rather than fork: the game process runs pygame and the audio thread
+        if self.pool is None and self.workers > 1:
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            #the workers import numpy while the player is still looking at the board
+            for _ in range(self.workers):
+                self.pool.submit(int)
+        return self.pool
+
+    def generate(self, width, height, mines, x, y):
+        #returns a seed, falling back to an ordinary board if none is found in time
+        deadline = time.perf_counter() + self.timeout
+        self.tried = 0
+        pool = self.start()
+        if pool is None:
+            while time.perf_counter() < deadline:
+                seed, tried = search(width, height, mines, x, y, 1)
+                self.tried += tried
+                if seed is not None:
+                    return seed
+            return new_seed()
+
+        args = (width, height, mines, x, y, BATCH)
+        #two tasks per worker so none sits idle while its next batch is queued
+        pending = {pool.submit(search, *args) for _ in range(self.workers * 2)}
+        try:
+            while True:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    return new_seed()
+                done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seed, tried = future.result()
+                    self.tried += tried
+                    if seed is not None:
+                        return seed
+                    pending.add(pool.submit(search, *args))
+        finally:
+            #batches already running finish in the background and are ignored
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
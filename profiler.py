@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+#frames kept for the overlay's FPS and percentiles, about 4 seconds at 60 FPS
+HISTORY = 240
+
+#spans kept for the trace file, the oldest are dropped first
+TRACE_LIMIT = 200000
+
+#sections shown on the overlay, in frame order
+SECTIONS = ('events', 'initialise', 'reveal', 'tick', 'board', 'hud', 'flip')
+
+_OFF = nullcontext()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter_ns() - self.start)
+
+
+class Profiler:
+    #times named sections of the frame, for the overlay and for Chrome trace files
+    #disabled, section() hands back a shared no-op context, so instrumented code
+    #costs one call per section
+    def __init__(self):
+        self.enabled = False
+        self.frames = deque(maxlen=HISTORY)      # (frame start ns, frame ns, {section: ns})
+        self.spans = deque(maxlen=TRACE_LIMIT)   # (name, start ns, duration ns, thread id)
+        self.frame_start = None
+        self.current = {}
+        self.epoch = time.perf_counter_ns()
+
+    def enable(self, on=True):
+        self.enabled = on
+        self.frame_start = None
+        self.current = {}
+        if not on:
+            self.frames.clear()
+
+    def section(self, name):
+        if not self.enabled:
+            return _OFF
+        return _Span(self, name)
+
+    def add(self, name, start, duration):
+        self.current[name] = self.current.get(name, 0) + duration
+        self.spans.append((name, start, duration, threading.get_ident()))
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+            self.current = {}
+
+    def end_frame(self):
+        #the frame is the work done before the clock sleeps
+        if self.enabled and self.frame_start is not None:
+            duration = time.perf_counter_ns() - self.frame_start
+            self.frames.append((self.frame_start, duration, self.current))
+            self.spans.append(('frame', self.frame_start, duration, threading.get_ident()))
+            self.frame_start = None
+
+    def summary(self):
+        #{'fps', 'p50', 'p99', 'sections': {name: mean ms per frame}} over the recent frames
+        if len(self.frames) < 2:
+            return None
+        frames = self.frames
+        times = sorted(duration for _, duration, _ in frames)
+        n = len(times)
+        elapsed = frames[-1][0] - frames[0][0]
+        totals = {}
+        for _, _, sections in frames:
+            for name, ns in sections.items():
+                totals[name] = totals.get(name, 0) + ns
+        return {
+            'fps': (n - 1) * 1e9 / elapsed if elapsed else 0.0,
+            'p50': times[n // 2] / 1e6,
+            'p99': times[min(n - 1, n * 99 // 100)] / 1e6,
+            'sections': {name: totals[name] / n / 1e6 for name in SECTIONS if name in totals},
+        }
+
+    def trace_events(self):
+        #complete ('X') events in microseconds, as chrome://tracing and Perfetto expect
+        pid = os.getpid()
+        return [{'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                 'ts': (start - self.epoch) / 1000, 'dur': duration / 1000}
+                for name, start, duration, tid in list(self.spans)]
+
+    def dump(self, path):
+        #writes the recorded spans as Chrome trace JSON, returns the path or None if there were none
+        events = self.trace_events()
+        if not events:
+            return None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        os.replace(tmp, path)
+        return path
+
+
+#the one profiler the game and the engine report to
+profiler = Profiler()
@@ -0,0 +1,279 @@
+import glob
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from engine import WON
+from metrics import board_metrics
+
+DEFAULT_PATH = 'rec/records.db'
+
+#best times used to live in one text file per board, they are imported once,
+#a row in meta records that it happened
+LEGACY_PATTERN = 'rec/best_time_*.txt'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS best_times (
+    board   TEXT PRIMARY KEY,
+    seconds REAL NOT NULL,
+    set_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id       INTEGER PRIMARY KEY,
+    board    TEXT NOT NULL,
+    seed     INTEGER NOT NULL,
+    width    INTEGER NOT NULL,
+    height   INTEGER NOT NULL,
+    mines    INTEGER NOT NULL,
+    started  REAL NOT NULL,
+    duration REAL NOT NULL,
+    clicks   INTEGER NOT NULL,
+    won      INTEGER NOT NULL,
+    bbbv     INTEGER NOT NULL,
+    openings INTEGER NOT NULL,
+    islands  INTEGER NOT NULL,
+    largest_opening INTEGER NOT NULL
+);
+-- the top times walk the won games of a board in time order
+CREATE INDEX IF NOT EXISTS games_by_time ON games (board, won, duration);
+-- the 3BV/s leaderboard, times normalised by how much the board asked of the player
+CREATE INDEX IF NOT EXISTS games_by_speed ON games (board, won, bbbv / duration);
+-- win rates count the games of a board started inside a window
+CREATE INDEX IF NOT EXISTS games_by_start ON games (board, started, won);
+-- running totals, so played and won counts never scan the games
+CREATE TABLE IF NOT EXISTS board_totals (
+    board  TEXT PRIMARY KEY,
+    played INTEGER NOT NULL,
+    won    INTEGER NOT NULL
+);
+-- won games per board and tenth of a second, percentiles read this instead of the games
+CREATE TABLE IF NOT EXISTS board_times (
+    board  TEXT NOT NULL,
+    tenths INTEGER NOT NULL,
+    games  INTEGER NOT NULL,
+    PRIMARY KEY (board, tenths)
+) WITHOUT ROWID;
+"""
+
+#only ever lowers a stored time, so a late or repeated write cannot undo a record
+UPSERT_BEST = """
+INSERT INTO best_times (board, seconds, set_at) VALUES (?, ?, ?)
+ON CONFLICT(board) DO UPDATE SET seconds = excluded.seconds, set_at = excluded.set_at
+WHERE excluded.seconds < best_times.seconds
+"""
+
+INSERT_GAME = """
+INSERT INTO games (board, seed, width, height, mines, started, duration, clicks, won,
+                   bbbv, openings, islands, largest_opening)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+ADD_TOTALS = """
+INSERT INTO board_totals (board, played, won) VALUES (?, 1, ?)
+ON CONFLICT(board) DO UPDATE SET played = played + 1, won = won + excluded.won
+"""
+
+ADD_TIME = """
+INSERT INTO board_times (board, tenths, games) VALUES (?, ?, 1)
+ON CONFLICT(board, tenths) DO UPDATE SET games = games + 1
+"""
+
+#longest the stats screen waits for queued writes, a huge board's metrics can take
+#seconds and its game shows up on the next look instead
+STATS_WAIT = 0.1
+
+#win rate windows on the stats screen, in seconds
+WINDOWS = (('24h', 86400), ('7 days', 7 * 86400), ('30 days', 30 * 86400))
+
+
+def board_key(name, width=None, height=None, mines=None):
+    #presets are stored by name, custom boards by their size
+    if name == 'Custom':
+        return f'Custom_{width}x{height}x{mines}'
+    return name
+
+
+def read_legacy(pattern=LEGACY_PATTERN):
+    #{board: seconds} from the old best_time_*.txt files, skipping "N/A" and junk
+    found = {}
+    for filename in glob.glob(pattern):
+        board = os.path.basename(filename)[len('best_time_'):-len('.txt')]
+        try:
+            with open(filename) as f:
+                found[board] = float(f.read().strip())
+        except (OSError, ValueError):
+            continue
+    return found
+
+
+class Records:
+    #best times and finished games in one SQLite file
+    #best times are held in memory, read once at startup
+    #writes are queued and a background thread commits everything queued so far
+    #in one transaction, so a win never waits on the disk
+    #path=None keeps the records in memory only
+    def __init__(self, path=DEFAULT_PATH, legacy=LEGACY_PATTERN):
+        self.path = path
+        self.best = {}
+        self.queue = queue.Queue()
+        self.thread = None
+        self.read_conn = None
+        if path is None:
+            return
+        try:
+            self.best = self.load(legacy)
+        except sqlite3.Error as err:
+            print(f"Error loading records: {err}")
+            self.path = None
+            return
+        self.thread = threading.Thread(target=self.writer, name='records', daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def load(self, legacy):
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executescript(SCHEMA)
+                imported = conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone()
+                if legacy and not imported:
+                    now = time.time()
+                    conn.executemany(UPSERT_BEST, [(board, seconds, now) for board, seconds in read_legacy(legacy).items()])
+                    conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(now),))
+            return dict(conn.execute('SELECT board, seconds FROM best_times'))
+        finally:
+            conn.close()
+
+    def best_time(self, board):
+        return self.best.get(board)
+
+    def submit_time(self, board, seconds):
+        #returns the best time for the board after this result
+        best = self.best.get(board)
+        if best is not None and best <= seconds:
+            return best
+        self.best[board] = seconds
+        if self.path is not None:
+            self.queue.put((write_best, (board, seconds, time.time())))
+        return seconds
+
+    def add_game(self, board, game):
+        #a finished game, its metrics (3BV, openings, islands) are worked out on the writer thread
+        if self.path is not None:
+            wall_start = time.time() - (game.clock() - game.start_time)
+            row = (board, game.seed, game.width, game.height, game.mines, wall_start,
+                   game.elapsed(), game.clicks, int(game.status == WON))
+            self.queue.put((write_game, (row, game.grid.value)))
+
+    def reader(self):
+        #the stats screen queries on its own connection, WAL lets it read while the writer commits
+        if self.read_conn is None:
+            self.read_conn = self.connect()
+        return self.read_conn
+
+    def stats(self, board, top=5, percentiles=(0.5, 0.9), now=None):
+        #summary for the stats screen, every query is an index range or an O(1) lookup,
+        #percentiles come from the per-board histogram, whose size depends on the spread
+        #of times and not on the number of games
+        #returns None when the records are kept in memory only
+        if self.path is None:
+            return None
+        self.flush(STATS_WAIT)
+        conn = self.reader()
+        now = time.time() if now is None else now
+        played, won = conn.execute('SELECT played, won FROM board_totals WHERE board = ?', (board,)).fetchone() or (0, 0)
+        best = conn.execute('SELECT duration, bbbv, started FROM games WHERE board = ? AND won = 1 '
+                            'ORDER BY duration LIMIT ?', (board, top)).fetchall()
+        fastest = conn.execute('SELECT bbbv / duration, duration, bbbv FROM games WHERE board = ? AND won = 1 '
+                               'AND bbbv / duration IS NOT NULL ORDER BY bbbv / duration DESC LIMIT ?',
+                               (board, top)).fetchall()
+        times = percentile_times(conn.execute('SELECT tenths, games FROM board_times WHERE board = ? ORDER BY tenths',
+                                              (board,)).fetchall(), won, percentiles)
+        rates = {}
+        for name, seconds in WINDOWS:
+            n, w = conn.execute('SELECT count(*), total(won) FROM games WHERE board = ? AND started >= ?',
+                                (board, now - seconds)).fetchone()
+            rates[name] = (int(w), n)
+        return {'played': played, 'won': won, 'best': best, 'fastest': fastest, 'percentiles': times, 'rates': rates}
+
+    def writer(self):
+        conn = self.connect()
+        try:
+            while True:
+                batch = [self.queue.get()]
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                writes = [item for item in batch if item is not None]
+                try:
+                    with conn:
+                        for write, args in writes:
+                            write(conn, *args)
+                except sqlite3.Error as err:
+                    print(f"Error saving records: {err}")
+                for _ in batch:
+                    self.queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def flush(self, timeout=None):
+        #waits until everything submitted so far is on disk, or until the timeout
+        #returns False if writes were still pending when it gave up
+        if self.thread is None:
+            return True
+        done = self.queue.all_tasks_done
+        with done:
+            return done.wait_for(lambda: not self.queue.unfinished_tasks, timeout)
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.read_conn is not None:
+            self.read_conn.close()
+            self.read_conn = None
+
+
+def write_best(conn, board, seconds, set_at):
+    conn.execute(UPSERT_BEST, (board, seconds, set_at))
+
+
+def write_game(conn, row, values):
+    found = board_metrics(values)
+    sizes = found['opening_sizes']
+    largest = int(sizes.max()) if len(sizes) else 0
+    conn.execute(INSERT_GAME, row + (found['bbbv'], found['openings'], found['islands'], largest))
+    conn.execute(ADD_TOTALS, (row[0], row[-1]))
+    if row[-1]:
+        conn.execute(ADD_TIME, (row[0], int(row[6] * 10)))
+
+
+def percentile_times(histogram, won, percentiles):
+    #{q: seconds} from (tenths, games) rows in time order, to the tenth of a second below
+    targets = sorted((int(q * (won - 1)), q) for q in percentiles) if won else []
+    times = {}
+    seen = 0
+    for tenths, games in histogram:
+        seen += games
+        while targets and targets[0][0] < seen:
+            times[targets.pop(0)[1]] = tenths / 10
+        if not targets:
+            break
+    return {q: times[q] for q in percentiles if q in times}
@@ -0,0 +1,196 @@
+import os
+import time
+
+from engine import WON
+
+#file layout: MAGIC, then length-prefixed frames
+#  frame   = varint(len(payload)) + payload
+#  payload = frame type byte + varint fields
+#  GAME  seed, width, height, mines, started (unix seconds)
+#  MOVE  tick delta (ms since the previous move), x, y, action
+#  END   result, duration (ms), clicks
+MAGIC = b"MSRP\x01"
+DEFAULT_PATH = 'rec/replays.bin'
+
+FRAME_GAME = 1
+FRAME_MOVE = 2
+FRAME_END = 3
+
+#move actions
+CLICK = 0
+FLAG = 1
+CHORD = 2
+
+#game results
+ABANDONED = 0
+RESULT_WON = 1
+RESULT_LOST = 2
+
+READ_CHUNK = 1 << 16
+
+
+def encode_varint(n, out):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def decode_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _frame(kind, *fields):
+    payload = bytearray([kind])
+    for field in fields:
+        encode_varint(field, payload)
+    out = bytearray()
+    encode_varint(len(payload), out)
+    out += payload
+    return out
+
+
+class Recorder:
+    #appends every game played to one replay file, path=None disables recording
+    #frames are buffered and flushed when a game ends
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.file = None
+        self.game = None
+        self.last_tick = 0
+
+    def open(self):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.file = open(self.path, 'ab')
+            if self.file.tell() == 0:
+                self.file.write(MAGIC)
+        return self.file
+
+    def record(self, game, action, x, y):
+        #called after the engine applied the move
+        if self.path is None or game.start_time is None or not game.replayable:
+            #nothing happens before the first click, there is no board yet
+            return
+        f = self.open()
+        first = game is not self.game
+        if first:
+            self.finish()
+            self.game = game
+            self.last_tick = 0
+            f.write(_frame(FRAME_GAME, game.seed, game.width, game.height, game.mines, int(time.time())))
+
+        #ticks count from the first click, which is when the engine starts its timer
+        end = game.end_time if game.end_time is not None else game.clock()
+        tick = 0 if first and not game.over else max(round((end - game.start_time) * 1000), self.last_tick)
+        f.write(_frame(FRAME_MOVE, tick - self.last_tick, x, y, action))
+        self.last_tick = tick
+
+        if game.over:
+            result = RESULT_WON if game.status == WON else RESULT_LOST
+            self._end(result, tick, game.clicks)
+
+    def finish(self):
+        #the current game was left unfinished (new game, quit)
+        if self.game is not None:
+            self._end(ABANDONED, self.last_tick, self.game.clicks)
+
+    def _end(self, result, duration, clicks):
+        self.file.write(_frame(FRAME_END, result, duration, clicks))
+        self.file.flush()
+        self.game = None
+
+    def close(self):
+        self.finish()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class GameRecord:
+    __slots__ = ('seed', 'width', 'height', 'mines', 'started', 'moves', 'result', 'duration', 'clicks')
+
+    def __init__(self, seed, width, height, mines, started):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.mines = mines
+        self.started = started
+        self.moves = []         # (tick ms since the first click, x, y, action)
+        self.result = None      # None if the file ends mid-game
+        self.duration = None
+        self.clicks = None
+
+    @property
+    def complete(self):
+        return self.result is not None
+
+    def __repr__(self):
+        return (f"GameRecord(seed={self.seed}, {self.width}x{self.height}x{self.mines}, "
+                f"moves={len(self.moves)}, result={self.result})")
+
+
+def iter_frames(f):
+    #yields (frame type, buffer, first field offset, frame end) reading the file in fixed chunks
+    buf = f.read(READ_CHUNK)
+    pos = 0
+    while True:
+        #make sure the length prefix and the frame are both in the buffer
+        if len(buf) - pos < 10:
+            buf = buf[pos:] + f.read(READ_CHUNK)
+            pos = 0
+            if not buf:
+                return
+        try:
+            length, start = decode_varint(buf, pos)
+        except IndexError:
+            return
+        end = start + length
+        if end > len(buf):
+            buf = buf[pos:] + f.read(max(READ_CHUNK, end - pos))
+            pos = 0
+            length, start = decode_varint(buf, pos)
+            end = start + length
+            if end > len(buf):
+                #truncated tail, e.g. the kiosk lost power mid-write
+                return
+        yield buf[start], buf, start + 1, end
+        pos = end
+
+
+def read_games(path):
+    #streams GameRecords one at a time, memory use does not grow with file size
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        game = None
+        for kind, buf, pos, end in iter_frames(f):
+            fields = []
+            while pos < end:
+                value, pos = decode_varint(buf, pos)
+                fields.append(value)
+            if kind == FRAME_GAME:
+                if game is not None:
+                    yield game
+                game = GameRecord(*fields[:5])
+                tick = 0
+            elif game is None:
+                continue
+            elif kind == FRAME_MOVE:
+                delta, x, y, action = fields[:4]
+                tick += delta
+                game.moves.append((tick, x, y, action))
+            elif kind == FRAME_END:
+                game.result, game.duration, game.clicks = fields[:3]
+                yield game
+                game = None
+        if game is not None:
+            yield game
@@ -0,0 +1,107 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+from itertools import islice
+
+from engine import Game, PLAYING, WON, LOST
+import replay
+
+FIELDS = ['file', 'game', 'seed', 'width', 'height', 'mines', 'moves',
+          'result', 'sim_result', 'duration_ms', 'sim_duration_ms', 'clicks', 'sim_clicks', 'ok']
+
+RESULT_NAMES = {replay.ABANDONED: 'abandoned', replay.RESULT_WON: 'won', replay.RESULT_LOST: 'lost', None: 'incomplete'}
+#engine status each recorded result must end in
+EXPECTED_STATUS = {replay.ABANDONED: PLAYING, replay.RESULT_WON: WON, replay.RESULT_LOST: LOST, None: PLAYING}
+
+
+def simulate(record):
+    #re-plays one recorded game headlessly, the clock is driven by the move ticks
+    now = [0.0]
+    game = Game(record.width, record.height, record.mines, seed=record.seed, clock=lambda: now[0])
+    for tick, x, y, action in record.moves:
+        now[0] = tick / 1000
+        if action == replay.CLICK:
+            game.click(x, y)
+        elif action == replay.FLAG:
+            game.flag(x, y)
+        elif action == replay.CHORD:
+            game.chord(x, y)
+    return game
+
+
+def verify(record):
+    game = simulate(record)
+    sim_duration = round(game.elapsed() * 1000)
+    ok = game.status == EXPECTED_STATUS[record.result]
+    if record.result in (replay.RESULT_WON, replay.RESULT_LOST):
+        #a win on the very first click can be 1ms apart from the recorded timer
+        ok = ok and abs(sim_duration - record.duration) <= 1
+    if record.clicks is not None:
+        ok = ok and game.clicks == record.clicks
+    return [record.seed, record.width, record.height, record.mines, len(record.moves),
+            RESULT_NAMES[record.result], game.status, record.duration, sim_duration,
+            record.clicks, game.clicks, ok]
+
+
+def verify_batch(batch):
+    path, first, records = batch
+    return [[path, first + i] + verify(record) for i, record in enumerate(records)]
+
+
+def batches(paths, size):
+    #streams the input files, sharding their games into batches for the pool
+    for path in paths:
+        games = replay.read_games(path)
+        first = 0
+        while True:
+            records = list(islice(games, size))
+            if not records:
+                break
+            yield path, first, records
+            first += len(records)
+
+
+def open_writer(fmt, out):
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(FIELDS)
+        return writer.writerow
+    return lambda row: out.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate recorded minesweeper games and verify their outcomes.")
+    parser.add_argument('files', nargs='+', help="replay files written by the game (rec/replays.bin)")
+    parser.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('-o', '--output', help="write results here instead of stdout")
+    parser.add_argument('--batch', type=int, default=500, help="games per work unit")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    write = open_writer(args.format, out)
+    games = failed = 0
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for rows in pool.imap(verify_batch, batches(args.files, args.batch)):
+                for row in rows:
+                    write(row)
+                    failed += not row[-1]
+                games += len(rows)
+    finally:
+        if args.output:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {failed} failed verification, {elapsed:.2f}s, "
+          f"{games / elapsed if elapsed else 0:,.0f} games/sec", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
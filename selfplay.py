@@ -0,0 +1,291 @@
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from functools import lru_cache
+
+from engine import Game, PLAYING, WON
+from game_logic import mines, compute_numbers, board_rng
+from grid import Grid
+from solver import MINE
+import settings
+
+POLICIES = ('random', 'logic', 'solver')
+
+
+def parse_board(text):
+    #a preset name or WIDTHxHEIGHTxMINES
+    if text in settings.difficulty_settings:
+        return settings.difficulty_settings[text]
+    try:
+        w, h, m = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a preset or WIDTHxHEIGHTxMINES, got {text!r}")
+    if w < 1 or h < 1 or not 0 <= m <= max(w * h - 9, 0):
+        raise argparse.ArgumentTypeError(f"{text!r} is not a playable board")
+    return w, h, m
+
+
+@lru_cache(maxsize=16)
+def neighbour_table(w, h):
+    #flat index (x * h + y, the order of Grid arrays) -> the flat indices around it
+    return [tuple(nx * h + ny for nx in range(max(x - 1, 0), min(x + 2, w))
+                  for ny in range(max(y - 1, 0), min(y + 2, h)) if nx != x or ny != y)
+            for x in range(w) for y in range(h)]
+
+
+def open_cell(i, values, shown, nbrs):
+    #reveals i and, for a zero, its whole opening; the newly shown cells, or None for a mine
+    if values[i] == -1:
+        return None
+    if shown[i]:
+        return []
+    shown[i] = True
+    new = [i]
+    stack = [i] if values[i] == 0 else []
+    while stack:
+        for n in nbrs[stack.pop()]:
+            if not shown[n]:
+                shown[n] = True
+                new.append(n)
+                if values[n] == 0:
+                    stack.append(n)
+    return new
+
+
+def flat_three_bv(values, nbrs):
+    #3BV on the flat lists, the same count as metrics.board_metrics but faster for small boards
+    seen = [False] * len(values)
+    count = 0
+    for i, v in enumerate(values):
+        if v == 0 and not seen[i]:
+            count += 1
+            open_cell(i, values, seen, nbrs)
+    return count + sum(1 for i, v in enumerate(values) if v > 0 and not seen[i])
+
+
+def deal(w, h, m, seed, x, y):
+    #the board initialise deals for this seed and first click, as flat lists
+    #(values, shown) with the opening already revealed
+    grid = Grid(w, h)
+    click = grid.tile(x, y)
+    mines(click, grid, m, board_rng(seed, w, h, m, click))
+    values = compute_numbers(grid).value.ravel().tolist()
+    shown = [False] * (w * h)
+    open_cell(x * h + y, values, shown, neighbour_table(w, h))
+    return values, shown
+
+
+def play_random(values, shown, nbrs, safe_left, rng):
+    #clicks hidden tiles in a random order, returns (won, clicks)
+    order = [i for i, s in enumerate(shown) if not s]
+    rng.shuffle(order)
+    clicks = 0
+    for i in order:
+        if shown[i]:
+            continue
+        clicks += 1
+        new = open_cell(i, values, shown, nbrs)
+        if new is None:
+            return False, clicks
+        safe_left -= len(new)
+        if not safe_left:
+            return True, clicks
+    return True, clicks
+
+
+def play_logic(values, shown, nbrs, safe_left, rng):
+    #the single-number rules only: a number with all its mines flagged opens the rest,
+    #a number with as many hidden tiles as missing mines flags them; otherwise a random guess
+    flags = [False] * len(values)
+    order = [i for i, s in enumerate(shown) if not s]
+    rng.shuffle(order)
+    work = {i for i, s in enumerate(shown) if s and values[i] > 0}
+    clicks = 0
+
+    def changed(cells):
+        #numbers next to a changed tile may have a move now
+        for c in cells:
+            if shown[c] and values[c] > 0:
+                work.add(c)
+            for n in nbrs[c]:
+                if shown[n] and values[n] > 0:
+                    work.add(n)
+
+    while safe_left:
+        while work and safe_left:
+            c = work.pop()
+            hidden = []
+            flagged = 0
+            for n in nbrs[c]:
+                if flags[n]:
+                    flagged += 1
+                elif not shown[n]:
+                    hidden.append(n)
+            if not hidden:
+                continue
+            if flagged == values[c]:
+                for n in hidden:
+                    if not shown[n]:
+                        clicks += 1
+                        new = open_cell(n, values, shown, nbrs)
+                        safe_left -= len(new)
+                        changed(new)
+            elif values[c] - flagged == len(hidden):
+                for n in hidden:
+                    flags[n] = True
+                clicks += len(hidden)
+                changed(hidden)
+        if not safe_left:
+            break
+        guess = next(i for i in order if not shown[i] and not flags[i])
+        clicks += 1
+        new = open_cell(guess, values, shown, nbrs)
+        if new is None:
+            return False, clicks
+        safe_left -= len(new)
+        changed(new)
+    return True, clicks
+
+
+def play_solver(w, h, m, seed, first):
+    #the hint engine's moves: deductions first, then the least risky guess
+    game = Game(w, h, m, seed=seed, clock=lambda: 0.0, cache=None)
+    game.click(*first)
+    while game.status == PLAYING:
+        kind, cell, _ = game.hint()
+        if kind == MINE:
+            game.flag(*cell)
+        else:
+            game.click(*cell)
+    return game.status == WON, game.clicks
+
+
+def first_click(w, h, where, rng):
+    if where == 'random':
+        return rng.randrange(w), rng.randrange(h)
+    return w // 2, h // 2
+
+
+def play_batch(task):
+    #plays count games of one board with one policy, returns the batch's histograms
+    #the RNG comes from the task, so results do not depend on the worker count
+    w, h, m, policy, seed, index, count, where = task
+    rng = random.Random(f"{seed}:{w}x{h}x{m}:{policy}:{index}")
+    nbrs = neighbour_table(w, h)
+    wins = 0
+    bbbv, bbbv_won, clicks_won = Counter(), Counter(), Counter()
+    for _ in range(count):
+        game_seed = rng.getrandbits(63)
+        x, y = first_click(w, h, where, rng)
+        values, shown = deal(w, h, m, game_seed, x, y)
+        board_bbbv = flat_three_bv(values, nbrs)
+        if policy == 'solver':
+            won, clicks = play_solver(w, h, m, game_seed, (x, y))
+        else:
+            safe_left = w * h - m - sum(shown)
+            play = play_random if policy == 'random' else play_logic
+            won, clicks = play(values, shown, nbrs, safe_left, rng) if safe_left else (True, 0)
+            clicks += 1     # the first click
+        bbbv[board_bbbv] += 1
+        if won:
+            wins += 1
+            bbbv_won[board_bbbv] += 1
+            clicks_won[clicks] += 1
+    return {'board': f'{w}x{h}x{m}', 'policy': policy, 'batch': index, 'games': count, 'wins': wins,
+            'bbbv': bbbv, 'bbbv_won': bbbv_won, 'clicks_won': clicks_won}
+
+
+def tasks(boards, policy, games, batch, seed, where):
+    #boards interleaved so every board has results early in a long run
+    pending = [[board, 0, 0] for board in boards]
+    while pending:
+        for entry in list(pending):
+            (w, h, m), done, index = entry
+            count = min(batch, games - done)
+            yield w, h, m, policy, seed, index, count, where
+            entry[1] += count
+            entry[2] += 1
+            if entry[1] >= games:
+                pending.remove(entry)
+
+
+def merge(total, part):
+    if total is None:
+        return {key: Counter(value) if isinstance(value, Counter) else value for key, value in part.items()}
+    total['games'] += part['games']
+    total['wins'] += part['wins']
+    for key in ('bbbv', 'bbbv_won', 'clicks_won'):
+        total[key].update(part[key])
+    return total
+
+
+def percentile(hist, q):
+    n = sum(hist.values())
+    if not n:
+        return None
+    target = q * (n - 1)
+    seen = 0
+    for value in sorted(hist):
+        seen += hist[value]
+        if seen > target:
+            return value
+
+
+def summary_line(total):
+    n, wins = total['games'], total['wins']
+    rate = wins / n
+    #95% normal interval, fine at these sample sizes
+    margin = 1.96 * math.sqrt(rate * (1 - rate) / n)
+    mean_bbbv = sum(k * v for k, v in total['bbbv'].items()) / n
+    clicks = percentile(total['clicks_won'], 0.5)
+    return (f"{total['board']:>12} {total['policy']:>7} {n:>10} {rate:>8.2%} ±{margin:>6.2%} "
+            f"{mean_bbbv:>8.1f} {clicks if clicks is not None else '-':>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many generated boards with a fixed policy and report win rates.")
+    parser.add_argument('boards', nargs='+', type=parse_board,
+                        help="presets (Easy, Medium, Hard) or WIDTHxHEIGHTxMINES")
+    parser.add_argument('-p', '--policy', choices=POLICIES, default='logic')
+    parser.add_argument('-n', '--games', type=int, default=100000, help="games per board")
+    parser.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument('--batch', type=int, default=2000, help="games per work unit")
+    parser.add_argument('--seed', type=int, default=0, help="master seed, the same seed plays the same games")
+    parser.add_argument('--first', choices=['center', 'random'], default='center', help="where the first click goes")
+    parser.add_argument('-o', '--output', help="stream every batch's histograms here as JSON lines")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w') if args.output else None
+    totals = {}
+    games = 0
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            work = tasks(args.boards, args.policy, args.games, args.batch, args.seed, args.first)
+            for part in pool.imap_unordered(play_batch, work):
+                if out is not None:
+                    out.write(json.dumps(part) + '\n')
+                totals[part['board']] = merge(totals.get(part['board']), part)
+                games += part['games']
+    finally:
+        if out is not None:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{'board':>12} {'policy':>7} {'games':>10} {'win rate':>8} {'':>7} {'3BV':>8} {'clicks':>8}")
+    for w, h, m in args.boards:
+        total = totals.get(f'{w}x{h}x{m}')
+        if total is not None:
+            print(summary_line(total))
+    print(f"{games} games, {elapsed:.2f}s, {games / elapsed if elapsed else 0:,.0f} games/sec", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,43 @@ difficulty_settings = {
 
 tile_size = 40
 
+#the board view never grows past this window size, bigger boards scroll (arrow keys)
+#and zoom (mouse wheel) between min_tile_size and max_tile_size pixels per tile
+max_window = (1600, 900)
+min_tile_size = 6
+max_tile_size = 64
+
+#the 'Custom' difficulty (width, height, mines), also settable from the command line
+custom_board = (100, 60, 900)
+max_board_size = 10000
+
+#the 'Endless' difficulty: share of mines, and where chunks far from the view are kept
+#(None uses a temporary folder that is removed when the game ends)
+endless_density = 0.16
+endless_store = None
+
+#redraw only the tiles that changed each frame instead of the whole screen
+incremental_render = True
+
+#sleep until input arrives or the screen is due to change, instead of redrawing 60 times a second
+event_driven = True
+
+#set to False to never start the mixer, e.g. on machines without a sound device
+audio_enabled = True
+
+#only deal boards that can be cleared from the first click without guessing
+no_guess = False
+
+#every game is appended here as a compact binary replay, None turns recording off
+replay_path = 'rec/replays.bin'
+
+#record frame timings from the start, F3 shows them and the trace is written to trace_dir on quit
+profile = False
+trace_dir = 'rec'
+
+#best times, kept in memory and written in the background, None keeps them in memory only
+records_path = 'rec/records.db'
+
 #Colors for various parts of game
 COLOR_STATUS_BAR = (58, 100, 52)      
 COLOR_UNCLICKED_LIGHT = (170, 215, 81)  
@@ -26,6 +63,8 @@ COLOR_POPUP_BG = (80, 80, 80)
 COLOR_BUTTON = (100, 150, 100)
 COLOR_BUTTON_HOVER = (120, 170, 120)
 COLOR_BORDER = (100, 130, 70)         
+COLOR_HINT = (40, 120, 230)           #hint outline, safe tile
+COLOR_HINT_MINE = (230, 40, 40)       #hint outline, mine to flag
 
 NUMBER_COLORS = {
     1: (0, 0, 255),    # blue
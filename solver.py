@@ -0,0 +1,379 @@
+import math
+
+import numpy as np
+
+from game_logic import count_adjacent
+from grid import FLAGGED
+
+#frontier components with more unknown tiles than this are estimated, not enumerated
+MAX_COMPONENT = 22
+
+SAFE = 'safe'
+MINE = 'mine'
+GUESS = 'guess'
+
+
+class Solver:
+    #deduces safe tiles and mines from what the player can see: revealed numbers only,
+    #player flags are not trusted
+    #update() takes the delta of every move, so each deduce() call only looks at
+    #the numbers whose neighbourhood changed
+    #box=(x0, y0, x1, y1) limits the search for already revealed tiles to that area
+    def __init__(self, grid, mines, box=None):
+        self.grid = grid
+        self.mines = mines
+        self.known_mines = set()
+        self.known_safe = set()     # deduced safe but not revealed yet
+        self.frontier = set()       # revealed numbers that still touch unknown tiles
+        self.dirty = set()          # frontier numbers to look at again
+        self.components = {}        # enumeration results keyed by component signature
+        self.adjacent = {}
+        if box is None:
+            self.update(np.argwhere(grid.revealed))
+        elif grid.revealed_safe:
+            x0, y0, x1, y1 = box
+            self.update(np.argwhere(grid.revealed[x0:x1 + 1, y0:y1 + 1]) + (x0, y0))
+
+    def neighbours(self, x, y):
+        #built on first use, only tiles near the frontier ever get an entry
+        found = self.adjacent.get((x, y))
+        if found is None:
+            w, h = self.grid.width, self.grid.height
+            found = self.adjacent[x, y] = [(nx, ny) for nx in range(max(x - 1, 0), min(x + 2, w))
+                                           for ny in range(max(y - 1, 0), min(y + 2, h)) if nx != x or ny != y]
+        return found
+
+    def constraint(self, cell):
+        #(unknown neighbours, mines still missing among them) for a revealed number
+        revealed = self.grid.revealed
+        unknown = []
+        missing = int(self.grid.value[cell])
+        for n in self.neighbours(*cell):
+            if n in self.known_mines:
+                missing -= 1
+            elif not revealed[n] and n not in self.known_safe:
+                unknown.append(n)
+        return unknown, missing
+
+    def touch(self, cell):
+        #numbers around a tile whose status changed need another look
+        revealed, value = self.grid.revealed, self.grid.value
+        for n in self.neighbours(*cell):
+            if revealed[n] and value[n] > 0:
+                self.dirty.add(n)
+
+    def update(self, delta):
+        value = self.grid.value
+        for x, y in delta.tolist():
+            cell = (x, y)
+            self.known_safe.discard(cell)
+            if value[x, y] == -1:
+                continue
+            if value[x, y] > 0:
+                self.dirty.add(cell)
+            self.touch(cell)
+
+    def mark(self, cells, is_mine, found):
+        known = self.known_mines if is_mine else self.known_safe
+        for cell in cells:
+            if cell not in known:
+                known.add(cell)
+                found.add(cell)
+                self.touch(cell)
+
+    def deduce(self):
+        #single-number rules first, then the subset rule between overlapping numbers
+        #returns the (safe, mines) found by this call
+        safe, mines = set(), set()
+        while self.dirty:
+            batch, self.dirty = self.dirty, set()
+            pending = {}
+            for cell in batch:
+                unknown, missing = self.constraint(cell)
+                if not unknown:
+                    self.frontier.discard(cell)
+                    continue
+                self.frontier.add(cell)
+                if missing == 0:
+                    self.mark(unknown, False, safe)
+                elif missing == len(unknown):
+                    self.mark(unknown, True, mines)
+                else:
+                    pending[cell] = (frozenset(unknown), missing)
+            if self.dirty:
+                #the trivial rules made progress, redo them before pairing numbers
+                self.dirty.update(pending)
+                continue
+
+            #numbers that share a tile are at most two apart
+            for cell, (unknown, missing) in pending.items():
+                x, y = cell
+                for ox in range(x - 2, x + 3):
+                    for oy in range(y - 2, y + 3):
+                        other = (ox, oy)
+                        if other == cell or other not in self.frontier:
+                            continue
+                        other_unknown, other_missing = self.constraint(other)
+                        other_unknown = frozenset(other_unknown)
+                        self.subset_rule(unknown, missing, other_unknown, other_missing, safe, mines)
+                        self.subset_rule(other_unknown, other_missing, unknown, missing, safe, mines)
+
+        if len(self.known_mines) == self.mines:
+            #every mine is known, whatever is left is safe
+            self.mark(map(tuple, np.argwhere(self.unknown_mask()).tolist()), False, safe)
+            if self.dirty:
+                more_safe, more_mines = self.deduce()
+                safe |= more_safe
+                mines |= more_mines
+        return safe, mines
+
+    def subset_rule(self, small, small_missing, big, big_missing, safe, mines):
+        #if one number's unknown tiles are inside another's, the difference
+        #holds exactly big_missing - small_missing mines
+        if small and small < big:
+            rest = big - small
+            extra = big_missing - small_missing
+            if extra == 0:
+                self.mark(rest, False, safe)
+            elif extra == len(rest):
+                self.mark(rest, True, mines)
+
+    def unknown_mask(self):
+        mask = ~self.grid.revealed
+        for cell in self.known_mines:
+            mask[cell] = False
+        for cell in self.known_safe:
+            mask[cell] = False
+        return mask
+
+    def probabilities(self):
+        #mine probability for every frontier tile, plus one value for all interior tiles
+        constraints = {}
+        for cell in self.frontier:
+            unknown, missing = self.constraint(cell)
+            if unknown:
+                constraints[cell] = (tuple(sorted(unknown)), missing)
+
+        components = _components(constraints)
+        frontier_cells = sum(len(cells) for cells, _ in components)
+        #from the grid's counters, the board itself is not scanned
+        grid = self.grid
+        unknown = grid.width * grid.height - grid.revealed_safe - len(self.known_mines) - len(self.known_safe)
+        interior = unknown - frontier_cells
+        remaining = self.mines - len(self.known_mines)
+
+        results = []
+        for cells, cons in components:
+            key = (cells, cons)
+            result = self.components.get(key)
+            if result is None:
+                result = self.components[key] = _enumerate(cells, cons)
+            results.append(result)
+
+        return _combine(components, results, interior, remaining)
+
+    def is_interior(self, cell):
+        #unknown and away from every revealed number
+        x, y = cell
+        if cell in self.known_mines or cell in self.known_safe:
+            return False
+        return not self.grid.revealed[max(x - 1, 0):x + 2, max(y - 1, 0):y + 2].any()
+
+    def interior_cell(self, probs):
+        #an unknown tile away from every revealed number, corners first, then the
+        #nearest one outwards from the frontier tiles in probs
+        w, h = self.grid.width, self.grid.height
+        for corner in ((0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)):
+            if self.is_interior(corner):
+                return corner
+        revealed = self.grid.revealed
+        seen = set(probs)
+        ring = sorted(probs)
+        while ring:
+            outer = []
+            for cell in ring:
+                for n in self.neighbours(*cell):
+                    if n not in seen and not revealed[n]:
+                        seen.add(n)
+                        outer.append(n)
+            outer.sort()
+            for cell in outer:
+                if self.is_interior(cell):
+                    return cell
+            ring = outer
+        #interior tiles cut off from the frontier by revealed ones
+        cells = np.argwhere(self.unknown_mask() & (count_adjacent(revealed) == 0))
+        return tuple(cells[0].tolist()) if len(cells) else None
+
+    def hint(self):
+        #(kind, (x, y), mine probability): a known safe tile, an unflagged known mine,
+        #or the least risky guess
+        self.deduce()
+        if self.known_safe:
+            return SAFE, min(self.known_safe), 0.0
+        state = self.grid.state
+        unflagged = sorted(c for c in self.known_mines if state[c] != FLAGGED)
+        if unflagged:
+            return MINE, unflagged[0], 1.0
+
+        if not self.grid.revealed_safe:
+            w, h = self.grid.width, self.grid.height
+            return GUESS, (w // 2, h // 2), self.mines / (w * h)
+
+        probs, interior_p = self.probabilities()
+        #safe in every layout the enumeration found, beyond what the rules can see
+        certain = [cell for cell, p in probs.items() if p == 0.0]
+        if certain:
+            self.mark(certain, False, set())
+            return SAFE, min(certain), 0.0
+        best = min(probs.items(), key=lambda item: (item[1], item[0]), default=None)
+        if best is None or (interior_p is not None and interior_p < best[1]):
+            cell = self.interior_cell(probs)
+            if cell is not None:
+                return GUESS, cell, interior_p
+        if best is None:
+            return None
+        return GUESS, best[0], best[1]
+
+
+def _components(constraints):
+    #groups numbers that share unknown tiles, each as (cells, constraints) with
+    #constraints given as (indices into cells, missing mines)
+    parent = {}
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    for unknown, _ in constraints.values():
+        for c in unknown:
+            parent.setdefault(c, c)
+        root = find(unknown[0])
+        for c in unknown[1:]:
+            other = find(c)
+            if other != root:
+                parent[other] = root
+
+    groups = {}
+    for cell in sorted(constraints):
+        unknown, missing = constraints[cell]
+        groups.setdefault(find(unknown[0]), []).append((unknown, missing))
+
+    components = []
+    for group in groups.values():
+        cells = tuple(sorted({c for unknown, _ in group for c in unknown}))
+        index = {c: i for i, c in enumerate(cells)}
+        cons = tuple(sorted({(tuple(index[c] for c in unknown), missing) for unknown, missing in group}))
+        components.append((cells, cons))
+    return components
+
+
+def _enumerate(cells, cons):
+    #counts the mine layouts of one component by mine total:
+    #returns {k: (layouts, [layouts with tile i mined])}
+    n = len(cells)
+    if n > MAX_COMPONENT:
+        return None
+    by_cell = [[] for _ in range(n)]
+    for ci, (idx, _) in enumerate(cons):
+        for i in idx:
+            by_cell[i].append(ci)
+    missing = [m for _, m in cons]
+    left = [len(idx) for idx, _ in cons]
+    assign = [0] * n
+    results = {}
+
+    def dfs(i, k):
+        if i == n:
+            count, per_cell = results.setdefault(k, [0, [0] * n])
+            results[k][0] = count + 1
+            for j in range(n):
+                per_cell[j] += assign[j]
+            return
+        for bit in (0, 1):
+            ok = True
+            for ci in by_cell[i]:
+                m = missing[ci] - bit
+                if m < 0 or m > left[ci] - 1:
+                    ok = False
+                    break
+            if not ok:
+                continue
+            for ci in by_cell[i]:
+                missing[ci] -= bit
+                left[ci] -= 1
+            assign[i] = bit
+            dfs(i + 1, k + bit)
+            for ci in by_cell[i]:
+                missing[ci] += bit
+                left[ci] += 1
+        assign[i] = 0
+
+    dfs(0, 0)
+    return results
+
+
+def _log_comb(n, k):
+    if k < 0 or k > n:
+        return None
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def _convolve(a, b):
+    out = {}
+    for ka, va in a.items():
+        for kb, vb in b.items():
+            out[ka + kb] = out.get(ka + kb, 0.0) + va * vb
+    return out
+
+
+def _combine(components, results, interior, remaining):
+    #weights every combination of component layouts by the ways to place the
+    #remaining mines in the interior, in log space to survive huge boards
+    probs = {}
+    exact = []
+    for (cells, cons), result in zip(components, results):
+        if result:
+            exact.append((cells, result))
+        else:
+            #too large or inconsistent: fall back to the local density of each number
+            for idx, missing in cons:
+                p = missing / len(idx)
+                for i in idx:
+                    probs[cells[i]] = max(probs.get(cells[i], 0.0), p)
+
+    dists = [{k: float(v[0]) for k, v in result.items()} for _, result in exact]
+    total = {0: 1.0}
+    for dist in dists:
+        total = _convolve(total, dist)
+
+    logs = {m: _log_comb(interior, remaining - m) for m in total}
+    logs = {m: v for m, v in logs.items() if v is not None}
+    if not logs:
+        return probs, None
+    top = max(logs.values())
+    weight = {m: math.exp(v - top) for m, v in logs.items()}
+    norm = sum(total[m] * weight[m] for m in weight)
+    if norm == 0:
+        return probs, None
+
+    for i, (cells, result) in enumerate(exact):
+        others = {0: 1.0}
+        for j, dist in enumerate(dists):
+            if j != i:
+                others = _convolve(others, dist)
+        per_cell = [0.0] * len(cells)
+        for k, (_, mined) in result.items():
+            w = sum(count * weight.get(k + m, 0.0) for m, count in others.items())
+            for c in range(len(cells)):
+                per_cell[c] += mined[c] * w
+        for c, cell in enumerate(cells):
+            probs[cell] = per_cell[c] / norm
+
+    interior_p = None
+    if interior:
+        interior_p = sum(total[m] * weight[m] * (remaining - m) / interior for m in weight) / norm
+    return probs, interior_p
+
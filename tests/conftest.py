@@ -0,0 +1,20 @@
+import random
+
+import pytest
+
+#random boards checked per test, small enough to run in a second or two
+BOARDS = 300
+
+
+def random_boards(seed, count=BOARDS):
+    #(width, height, mines, board seed, first click x, first click y) for playable boards
+    rng = random.Random(seed)
+    for _ in range(count):
+        w, h = rng.randint(1, 30), rng.randint(1, 30)
+        m = rng.randint(0, max(w * h - 9, 0))
+        yield w, h, m, rng.getrandbits(63), rng.randrange(w), rng.randrange(h)
+
+
+@pytest.fixture
+def boards():
+    return random_boards
@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+
+import metrics
+from game_logic import count_adjacent, initialise
+from grid import Grid
+from metrics import board_metrics, label
+from selfplay import flat_three_bv, neighbour_table
+
+
+def reference_label(mask):
+    #plain flood fill: (labels, count) numbered in scan order
+    w, h = mask.shape
+    labels = np.zeros((w, h), dtype=np.int32)
+    count = 0
+    for x in range(w):
+        for y in range(h):
+            if mask[x, y] and not labels[x, y]:
+                count += 1
+                labels[x, y] = count
+                stack = [(x, y)]
+                while stack:
+                    cx, cy = stack.pop()
+                    for nx in range(max(cx - 1, 0), min(cx + 2, w)):
+                        for ny in range(max(cy - 1, 0), min(cy + 2, h)):
+                            if mask[nx, ny] and not labels[nx, ny]:
+                                labels[nx, ny] = count
+                                stack.append((nx, ny))
+    return labels, count
+
+
+def same_partition(a, b):
+    #the two labellings split the tiles into the same groups
+    pairs = set(zip(a.ravel().tolist(), b.ravel().tolist()))
+    return len(pairs) == len({p[0] for p in pairs}) == len({p[1] for p in pairs})
+
+
+def dealt(boards, seed):
+    #tile values of the boards, as dealt by the game
+    for w, h, m, board_seed, x, y in boards(seed):
+        grid = Grid(w, h)
+        initialise(grid, grid.tile(x, y), m, seed=board_seed, cache=None)
+        yield grid.value
+
+
+def test_label_matches_flood_fill(boards):
+    rng = random.Random(3)
+    for w, h, *_ in boards(3):
+        mask = np.array([[rng.random() < 0.45 for _ in range(h)] for _ in range(w)], dtype=np.bool_)
+        labels, count = label(mask)
+        expected, expected_count = reference_label(mask)
+        assert count == expected_count
+        assert same_partition(labels, expected)
+
+
+def check_metrics(values):
+    zero_labels, openings = reference_label(values == 0)
+    lone = (values > 0) & (count_adjacent(values == 0) == 0)
+    _, islands = reference_label(lone)
+    found = board_metrics(values)
+    assert found['openings'] == openings
+    assert found['islands'] == islands
+    assert found['bbbv'] == openings + int(np.count_nonzero(lone))
+    sizes = np.bincount(zero_labels.ravel(), minlength=openings + 1)[1:]
+    assert sorted(found['opening_sizes'].tolist()) == sorted(sizes.tolist())
+
+
+def test_board_metrics_match_flood_fill(boards):
+    for values in dealt(boards, 4):
+        check_metrics(values)
+
+
+def test_board_metrics_in_bands(boards, monkeypatch):
+    #bands down to a single column, so components spanning many bands are joined
+    rng = random.Random(5)
+    for values in dealt(boards, 6):
+        h = values.shape[1]
+        monkeypatch.setattr(metrics, 'CHUNK', rng.choice([1, h, 2 * h, 3 * h + 1]))
+        check_metrics(values)
+
+
+def test_flat_three_bv_matches_board_metrics(boards):
+    for values in dealt(boards, 7):
+        w, h = values.shape
+        assert flat_three_bv(values.ravel().tolist(), neighbour_table(w, h)) == board_metrics(values)['bbbv']
@@ -0,0 +1,35 @@
+import random
+
+from engine import Game
+from game_logic import initialise, reveal
+from grid import Grid
+from selfplay import deal, neighbour_table, open_cell
+
+def test_deal_matches_initialise(boards):
+    #the flat fast path must deal the board the game deals for the same seed and first click
+    for w, h, m, seed, x, y in boards(1):
+        grid = Grid(w, h)
+        initialise(grid, grid.tile(x, y), m, seed=seed, cache=None)
+        values, shown = deal(w, h, m, seed, x, y)
+        assert values == grid.value.ravel().tolist(), (w, h, m, seed, x, y)
+        assert shown == grid.revealed.ravel().tolist(), (w, h, m, seed, x, y)
+
+
+def test_open_cell_matches_reveal(boards):
+    #every later click opens the same tiles as the engine's reveal
+    for w, h, m, seed, x, y in boards(2):
+        game = Game(w, h, m, seed=seed, clock=lambda: 0.0)
+        game.click(x, y)
+        values, shown = deal(w, h, m, seed, x, y)
+        nbrs = neighbour_table(w, h)
+        order = list(range(w * h))
+        random.Random(seed).shuffle(order)
+        for i in order[:10]:
+            cx, cy = divmod(i, h)
+            result, delta = reveal(game.grid, game.grid.tile(cx, cy))
+            new = open_cell(i, values, shown, nbrs)
+            if new is None:
+                assert result == "mine"
+                continue
+            assert sorted(new) == sorted((delta[:, 0] * h + delta[:, 1]).tolist())
+        assert shown == (game.grid.revealed & (game.grid.value != -1)).ravel().tolist()